@@ -0,0 +1,58 @@
+import argparse
+import socket
+import sys
+import time
+
+# Stands in for a live captioning process when testing live input: writes SRT cues in real
+# time, each one as its start time comes up, to stdout, a file or FIFO, or a TCP connection.
+
+WORDS = ['subtitle', 'line', 'hello', 'world', 'café', 'test', 'naïve', '日本語', 'Привет', 'live', 'caption']
+
+
+def iter_cues(count, interval, duration):
+    for number in range(1, count + 1 if count else sys.maxsize):
+        start = (number - 1) * interval
+        text = ' '.join(WORDS[(number + offset) % len(WORDS)] for offset in range(number % 6 + 2))
+        yield number, start, start + duration, text
+
+
+def format_time(ms):
+    seconds, ms = divmod(ms, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{ms:03d}"
+
+
+def open_output(target):
+    if target == '-':
+        return sys.stdout.buffer.write, sys.stdout.buffer.flush
+    if target.startswith('tcp:'):
+        host, _, port = target[4:].rpartition(':')
+        sock = socket.create_connection((host or '127.0.0.1', int(port)))
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock.sendall, lambda: None
+    f = open(target, 'wb', buffering=0)
+    return f.write, lambda: None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write SRT cues in real time like a live captioner")
+    parser.add_argument('target', nargs='?', default='-', help="- for stdout, a file or FIFO path, or tcp:host:port")
+    parser.add_argument('--interval', type=int, default=1500, help="Milliseconds between cue starts")
+    parser.add_argument('--duration', type=int, default=1200, help="Milliseconds each cue is shown")
+    parser.add_argument('--count', type=int, default=0, help="Number of cues (default: until interrupted)")
+    parser.add_argument('--speed', type=float, default=1.0, help="Send faster than real time")
+    args = parser.parse_args()
+
+    write, flush = open_output(args.target)
+    started = time.monotonic()
+    for number, start, end, text in iter_cues(args.count, args.interval, args.duration):
+        delay = started + start / 1000 / args.speed - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        write(f"{number}\n{format_time(start)} --> {format_time(end)}\n{text}\n\n".encode('utf-8'))
+        flush()
+
+
+if __name__ == '__main__':
+    main()
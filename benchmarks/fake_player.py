@@ -0,0 +1,117 @@
+import argparse
+import json
+import os
+import random
+import socket
+import threading
+import time
+
+# Stands in for a media player when testing sync mode: plays a virtual clock and reports it
+# the way mpv's JSON IPC or the timecode protocol would.
+
+
+class VirtualPlayer:
+    def __init__(self, start, rate, seek_every):
+        self.position = start
+        self.rate = rate
+        self.paused = False
+        self.seek_every = seek_every
+        self.last = time.monotonic()
+        self.next_seek = time.monotonic() + seek_every if seek_every else None
+
+    def tick(self):
+        # Returns the position in seconds, seeking to a random spot every seek_every seconds
+        now = time.monotonic()
+        if not self.paused:
+            self.position += (now - self.last) * self.rate
+        self.last = now
+        if self.next_seek and now >= self.next_seek:
+            self.position = random.uniform(0, self.position + 60)
+            self.next_seek = now + self.seek_every
+            print(f"Seeked to {self.position:.3f} s", flush=True)
+        return self.position
+
+
+def serve_mpv(path, player, fps, jitter):
+    if os.path.exists(path):
+        os.remove(path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(1)
+    print(f"Fake mpv listening on {path}", flush=True)
+    while True:
+        client, _ = server.accept()
+        observed = {}
+        lock = threading.Lock()
+
+        def send(message):
+            with lock:
+                client.sendall(json.dumps(message).encode() + b'\n')
+
+        def reader():
+            pending = b''
+            while True:
+                chunk = client.recv(65536)
+                if not chunk:
+                    return
+                lines = (pending + chunk).split(b'\n')
+                pending = lines.pop()
+                for line in lines:
+                    request = json.loads(line)
+                    command = request['command']
+                    if command[0] == 'observe_property':
+                        observed[command[2]] = command[1]
+                        send({'error': 'success', 'request_id': request.get('request_id', 0)})
+                        value = {'pause': player.paused, 'speed': player.rate}.get(command[2])
+                        if value is not None:
+                            send({'event': 'property-change', 'id': command[1], 'name': command[2], 'data': value})
+                    elif command[0] == 'get_property':
+                        send({'data': player.tick(), 'error': 'success', 'request_id': request.get('request_id', 0)})
+
+        threading.Thread(target=reader, daemon=True).start()
+        try:
+            while True:
+                time.sleep(max(1 / fps + random.uniform(-jitter, jitter) / 1000, 0))
+                if 'time-pos' in observed:
+                    send({'event': 'property-change', 'id': observed['time-pos'], 'name': 'time-pos', 'data': player.tick()})
+        except OSError:
+            print("Client disconnected", flush=True)
+
+
+def send_timecodes(protocol, host, port, player, fps, jitter):
+    if protocol == 'udp':
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        send = lambda data: sock.sendto(data, (host, port))
+    else:
+        server = socket.create_server((host, port))
+        print(f"Fake player waiting for a TCP connection on {host}:{port}", flush=True)
+        sock, _ = server.accept()
+        send = sock.sendall
+    while True:
+        time.sleep(max(1 / fps + random.uniform(-jitter, jitter) / 1000, 0))
+        message = {'position': player.tick(), 'paused': player.paused, 'rate': player.rate, 'sent': time.time()}
+        send(json.dumps(message).encode() + b'\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake media player for testing the viewer's sync mode")
+    parser.add_argument('mode', choices=['mpv', 'udp', 'tcp'])
+    parser.add_argument('--socket', default='/tmp/mpvsocket', help="Unix socket path for mpv mode")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9000)
+    parser.add_argument('--start', type=float, default=0.0, help="Start position in seconds")
+    parser.add_argument('--rate', type=float, default=1.0)
+    parser.add_argument('--fps', type=float, default=60.0, help="Position updates per second")
+    parser.add_argument('--jitter', type=float, default=2.0, help="Random send jitter in milliseconds")
+    parser.add_argument('--seek-every', type=float, default=0.0, help="Seek to a random position every N seconds")
+    args = parser.parse_args()
+
+    player = VirtualPlayer(args.start, args.rate, args.seek_every)
+    if args.mode == 'mpv':
+        serve_mpv(args.socket, player, args.fps, args.jitter)
+    else:
+        send_timecodes(args.mode, args.host, args.port, player, args.fps, args.jitter)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+import argparse
+import os
+import random
+
+# Words that every supported test encoding can represent
+WORDS = {
+    'utf-8': ['hello', 'world', 'naïve', 'café', '日本語', '字幕', 'Привет', 'subtitle', 'line', 'test'],
+    'cp1252': ['hello', 'world', 'naïve', 'café', 'déjà', 'crème', 'über', 'subtitle', 'line', 'test'],
+    'utf-16': ['hello', 'world', 'naïve', 'café', '日本語', '字幕', 'Привет', 'subtitle', 'line', 'test'],
+    'shift_jis': ['hello', 'world', '日本語', '字幕', 'テスト', 'こんにちは', 'subtitle', 'line', 'test', 'word'],
+}
+ASS_TAGS = ['{\\i1}', '{\\i0}', '{\\b1}', '{\\b0}', '{\\pos(320,50)}', '{\\fad(200,200)}', '{\\c&H00FFFF&}', '{\\k20}']
+
+
+def generate_cues(count, overlap=0.0, tag_density=0.0, encoding='utf-8', seed=1):
+    # Returns (start_ms, end_ms, text) tuples in start order. overlap is the fraction of cues
+    # that run into the next one; tag_density is the chance of an ASS override tag per word.
+    rng = random.Random(seed)
+    words = WORDS.get(encoding, WORDS['utf-8'])
+    cues = []
+    start = 0
+    for _ in range(count):
+        duration = rng.randint(800, 4000)
+        gap = rng.randint(50, 1500)
+        end = start + duration
+        if rng.random() < overlap:
+            end += gap + rng.randint(200, 2000)
+        parts = []
+        for _ in range(rng.randint(3, 12)):
+            if rng.random() < tag_density:
+                parts.append(rng.choice(ASS_TAGS))
+            parts.append(rng.choice(words))
+        cues.append((start, end, ' '.join(parts)))
+        start += duration + gap
+    return cues
+
+
+def format_time(ms, separator=','):
+    seconds, ms = divmod(ms, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{separator}{ms:03d}"
+
+
+def format_ass_time(ms):
+    seconds, ms = divmod(ms, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}.{ms // 10:02d}"
+
+
+def strip_ass_tags(text):
+    for tag in ASS_TAGS:
+        text = text.replace(tag, '')
+    return text
+
+
+def render_srt(cues):
+    for number, (start, end, text) in enumerate(cues, 1):
+        yield f"{number}\n{format_time(start)} --> {format_time(end)}\n{strip_ass_tags(text)}\n\n"
+
+
+def render_vtt(cues):
+    yield "WEBVTT\n\n"
+    for start, end, text in cues:
+        yield f"{format_time(start, '.')} --> {format_time(end, '.')}\n{strip_ass_tags(text)}\n\n"
+
+
+def render_ass(cues):
+    yield ("[Script Info]\nScriptType: v4.00+\n\n[V4+ Styles]\n"
+           "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, "
+           "Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, "
+           "Shadow, Alignment, MarginL, MarginR, MarginV, Encoding\n"
+           "Style: Default,Arial,20,&H00FFFFFF,&H000000FF,&H00000000,&H00000000,0,0,0,0,100,100,0,0,1,2,2,2,10,10,10,1\n\n"
+           "[Events]\nFormat: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n")
+    for start, end, text in cues:
+        yield f"Dialogue: 0,{format_ass_time(start)},{format_ass_time(end)},Default,,0,0,0,,{text}\n"
+
+
+RENDERERS = {'srt': render_srt, 'vtt': render_vtt, 'ass': render_ass}
+
+
+def write_corpus(path, subtitle_format, cues, encoding='utf-8'):
+    with open(path, 'w', encoding=encoding, newline='\n') as f:
+        for block in RENDERERS[subtitle_format](cues):
+            f.write(block)
+    return path
+
+
+def corpus_path(directory, subtitle_format, count, overlap, tag_density, encoding):
+    name = f"corpus_{count}_o{overlap:g}_t{tag_density:g}_{encoding}.{subtitle_format}"
+    return os.path.join(directory, name)
+
+
+def ensure_corpus(directory, subtitle_format, count, overlap=0.0, tag_density=0.0, encoding='utf-8'):
+    # Generated files are reused between runs; the generator is deterministic
+    os.makedirs(directory, exist_ok=True)
+    path = corpus_path(directory, subtitle_format, count, overlap, tag_density, encoding)
+    if not os.path.exists(path):
+        cues = generate_cues(count, overlap, tag_density if subtitle_format == 'ass' else 0.0, encoding)
+        write_corpus(path, subtitle_format, cues, encoding)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic subtitle files for benchmarking")
+    parser.add_argument('output_dir')
+    parser.add_argument('--formats', nargs='+', default=['srt', 'vtt', 'ass'], choices=sorted(RENDERERS))
+    parser.add_argument('--sizes', nargs='+', type=int, default=[1000, 10000, 100000])
+    parser.add_argument('--overlap', type=float, default=0.0, help="Fraction of cues overlapping the next one")
+    parser.add_argument('--tag-density', type=float, default=0.0, help="Chance of an ASS override tag per word")
+    parser.add_argument('--encoding', default='utf-8', choices=sorted(WORDS))
+    args = parser.parse_args()
+    for subtitle_format in args.formats:
+        for count in args.sizes:
+            print(ensure_corpus(args.output_dir, subtitle_format, count, args.overlap, args.tag_density, args.encoding))
+
+
+if __name__ == '__main__':
+    main()
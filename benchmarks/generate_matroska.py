@@ -0,0 +1,144 @@
+import argparse
+import os
+import sys
+import zlib
+
+# Writes a Matroska file the way mkvmerge lays one out: a SeekHead, Info and Tracks, then
+# clusters of (dummy) video frames with subtitle BlockGroups among them, and Cues at the end.
+# Used to test and benchmark reading embedded subtitle tracks without mkvmerge.
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from generate_corpus import generate_cues  # noqa: E402
+import subtitle_matroska as mkv  # noqa: E402
+from subtitle_cues import Cue  # noqa: E402
+
+VIDEO_TRACK = 1
+SRT_TRACK = 2
+ASS_TRACK = 3
+CLUSTER_MS = 2000
+SEEK_HEAD_SIZE = 128  # Reserved up front and filled in once the Cues position is known
+
+
+def encode_id(element_id):
+    return element_id.to_bytes((element_id.bit_length() + 7) // 8, 'big')
+
+
+def encode_size(size, length=None):
+    if length is None:
+        length = 1
+        while size >= (1 << (7 * length)) - 1:
+            length += 1
+    return ((1 << (7 * length)) | size).to_bytes(length, 'big')
+
+
+def element(element_id, payload):
+    return encode_id(element_id) + encode_size(len(payload)) + payload
+
+
+def uint(element_id, value, length=None):
+    return element(element_id, value.to_bytes(length or max((value.bit_length() + 7) // 8, 1), 'big'))
+
+
+def text(element_id, value):
+    return element(element_id, value.encode('utf-8'))
+
+
+def block(track, timestamp, payload, keyframe=False):
+    return encode_size(track) + timestamp.to_bytes(2, 'big', signed=True) + bytes([0x80 if keyframe else 0]) + payload
+
+
+def track_entry(number, track_type, codec, language='eng', name=None, compress=False):
+    payload = (uint(mkv.TRACK_NUMBER, number) + uint(0x73C5, number) + uint(mkv.TRACK_TYPE, track_type)
+               + text(mkv.CODEC_ID, codec) + text(mkv.LANGUAGE, language))
+    if name:
+        payload += text(mkv.NAME, name)
+    if compress:
+        compression = element(mkv.CONTENT_COMPRESSION, uint(mkv.CONTENT_COMP_ALGO, 0))
+        payload += element(mkv.CONTENT_ENCODINGS, element(mkv.CONTENT_ENCODING, compression))
+    return element(mkv.TRACK_ENTRY, payload)
+
+
+def write_matroska(path, count, video_bytes_per_second, subtitle_cues=True, compress=False, seed=1):
+    cues = [Cue(*cue) for cue in generate_cues(count, overlap=0.05, seed=seed)]
+    end_time = max(cue.end for cue in cues)
+    frame_bytes = video_bytes_per_second // 25
+    frame = bytes(frame_bytes)
+
+    with open(path, 'wb') as f:
+        f.write(element(mkv.EBML, text(mkv.DOC_TYPE, 'matroska') + uint(0x4287, 4) + uint(0x4285, 2)))
+        f.write(encode_id(mkv.SEGMENT) + encode_size(0, 8))  # Size patched at the end
+        segment_start = f.tell()
+        f.write(bytes(SEEK_HEAD_SIZE))
+        info_position = f.tell() - segment_start
+        f.write(element(mkv.INFO, uint(mkv.TIMESTAMP_SCALE, 1000000) + text(0x4D80, 'generate_matroska')))
+        tracks_position = f.tell() - segment_start
+        f.write(element(mkv.TRACKS, track_entry(VIDEO_TRACK, 1, 'V_UNCOMPRESSED')
+                        + track_entry(SRT_TRACK, 0x11, 'S_TEXT/UTF8', 'eng', compress=compress)
+                        + track_entry(ASS_TRACK, 0x11, 'S_TEXT/ASS', 'jpn', 'Signs')))
+
+        cue_points = []
+        next_cue = 0
+        for cluster_time in range(0, end_time + CLUSTER_MS, CLUSTER_MS):
+            cluster_position = f.tell() - segment_start
+            children = [uint(mkv.CLUSTER_TIMESTAMP, cluster_time)]
+            frames = [(time, None) for time in range(0, CLUSTER_MS, 40)]  # None: a video frame
+            while next_cue < len(cues) and cues[next_cue].start < cluster_time + CLUSTER_MS:
+                frames.append((cues[next_cue].start - cluster_time, next_cue))
+                next_cue += 1
+            frames.sort(key=lambda item: (item[0], item[1] is not None))
+            points = [(cluster_time, VIDEO_TRACK, 0)]
+            offset = len(children[0])
+            for relative_time, item in frames:
+                if item is None:
+                    child = element(mkv.SIMPLE_BLOCK, block(VIDEO_TRACK, relative_time, frame, relative_time == 0))
+                else:
+                    cue = cues[item]
+                    srt = cue.text.encode('utf-8')
+                    if compress:
+                        srt = zlib.compress(srt)
+                    duration = uint(mkv.BLOCK_DURATION, cue.end - cue.start)
+                    child = element(mkv.BLOCK_GROUP, element(mkv.BLOCK, block(SRT_TRACK, relative_time, srt)) + duration)
+                    ass = f"{item},0,Default,,0,0,0,,{{\\i1}}{cue.text}{{\\i0}}".encode('utf-8')
+                    ass_child = element(mkv.BLOCK_GROUP, element(mkv.BLOCK, block(ASS_TRACK, relative_time, ass)) + duration)
+                    if subtitle_cues:
+                        points.append((cue.start, SRT_TRACK, offset))
+                        points.append((cue.start, ASS_TRACK, offset + len(child)))
+                    child += ass_child
+                children.append(child)
+                offset += len(child)
+            f.write(element(mkv.CLUSTER, b''.join(children)))
+            cue_points.extend((time, track, cluster_position, relative) for time, track, relative in points)
+
+        cues_position = f.tell() - segment_start
+        f.write(element(mkv.CUES, b''.join(
+            element(mkv.CUE_POINT, uint(0xB3, time) + element(mkv.CUE_TRACK_POSITIONS, uint(mkv.CUE_TRACK, track)
+                    + uint(mkv.CUE_CLUSTER_POSITION, cluster) + uint(mkv.CUE_RELATIVE_POSITION, relative)))
+            for time, track, cluster, relative in sorted(cue_points))))
+        segment_end = f.tell()
+
+        seeks = b''.join(element(mkv.SEEK, element(mkv.SEEK_ID, encode_id(target)) + uint(mkv.SEEK_POSITION, position, 8))
+                         for target, position in ((mkv.INFO, info_position), (mkv.TRACKS, tracks_position),
+                                                  (mkv.CUES, cues_position)))
+        seek_head = element(mkv.SEEK_HEAD, seeks)
+        void = SEEK_HEAD_SIZE - len(seek_head) - 2
+        f.seek(segment_start)
+        f.write(seek_head + bytes([0xEC]) + encode_size(void, 1) + bytes(void))
+        f.seek(segment_start - 8)
+        f.write(encode_size(segment_end - segment_start, 8))
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a Matroska file with video and two subtitle tracks")
+    parser.add_argument('output')
+    parser.add_argument('--count', type=int, default=1000, help="Subtitle cues")
+    parser.add_argument('--video-rate', type=int, default=1000000, help="Bytes of dummy video per second")
+    parser.add_argument('--no-subtitle-cues', action='store_true', help="Index only the video track")
+    parser.add_argument('--compress', action='store_true', help="zlib-compress the SRT track")
+    args = parser.parse_args()
+    write_matroska(args.output, args.count, args.video_rate, not args.no_subtitle_cues, args.compress)
+    print(f"Wrote {args.output} ({os.path.getsize(args.output) / 1048576:.1f} MiB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_child():
+    # Runs in a fresh interpreter: times the import of the viewer and the first painted window
+    started = time.time()
+    sys.path.insert(0, REPO_DIR)
+    import subtitle_reader
+    imported = time.time()
+
+    from PyQt6.QtCore import QEvent, QObject, QTimer
+    from PyQt6.QtWidgets import QApplication
+
+    app = QApplication(sys.argv[:1])
+    marks = {'import_done': imported, 'process_started': started}
+
+    class FirstPaint(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Type.Paint and 'first_paint' not in marks:
+                marks['first_paint'] = time.time()
+                QTimer.singleShot(0, app.quit)
+            return False
+
+    watcher = FirstPaint()
+    app.installEventFilter(watcher)
+    window = subtitle_reader.SubtitleReader()
+    marks['window_created'] = time.time()
+    QTimer.singleShot(10000, app.quit)  # Give up if nothing is ever painted
+    app.exec()
+    window.close()
+    print(json.dumps(marks))
+
+
+def measure_once():
+    spawned = time.time()
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child'],
+                            capture_output=True, text=True, check=True).stdout
+    marks = json.loads(output.strip().splitlines()[-1])
+    first_paint = marks.get('first_paint', marks['window_created'])
+    return {
+        'interpreter_startup_ms': (marks['process_started'] - spawned) * 1000,
+        'import_ms': (marks['import_done'] - marks['process_started']) * 1000,
+        'window_created_ms': (marks['window_created'] - spawned) * 1000,
+        'first_window_ms': (first_paint - spawned) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time and time-to-first-window of the viewer")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--offscreen', action='store_true', help="Use Qt's offscreen platform (headless machines)")
+    parser.add_argument('--max-import-ms', type=float, help="Fail if the median import time exceeds this")
+    parser.add_argument('--max-first-window-ms', type=float, help="Fail if the median time to first window exceeds this")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child()
+        return
+    if args.offscreen:
+        os.environ['QT_QPA_PLATFORM'] = 'offscreen'
+
+    runs = [measure_once() for _ in range(args.runs)]
+    result = {key: round(statistics.median(run[key] for run in runs), 1) for key in runs[0]}
+    result['runs'] = args.runs
+    print(json.dumps(result, indent=2))
+
+    failures = []
+    if args.max_import_ms is not None and result['import_ms'] > args.max_import_ms:
+        failures.append(f"import took {result['import_ms']} ms (limit {args.max_import_ms} ms)")
+    if args.max_first_window_ms is not None and result['first_window_ms'] > args.max_first_window_ms:
+        failures.append(f"first window took {result['first_window_ms']} ms (limit {args.max_first_window_ms} ms)")
+    for failure in failures:
+        print(f"Regression: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
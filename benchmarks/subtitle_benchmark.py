@@ -0,0 +1,186 @@
+import argparse
+import gc
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from generate_corpus import ensure_corpus
+from subtitle_encoding import detect_encoding
+from subtitle_engine import SubtitleEngine, VirtualClock
+from subtitle_loader import load_timeline, read_file
+from subtitle_text import render_plain_text, render_rich_text
+
+TICK_MS = 10
+TICKS = 2000
+SEEKS = 1000
+
+
+def median_ms(function, repeat):
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times)
+
+
+def clear_render_caches():
+    render_rich_text.cache_clear()
+    render_plain_text.cache_clear()
+
+
+def bench_load(path, repeat):
+    result = {'parse_ms': median_ms(lambda: load_timeline(path, use_cache=False), repeat)}
+    load_timeline(path)  # Make sure the cue cache holds this file
+    result['cached_load_ms'] = median_ms(lambda: load_timeline(path), repeat)
+
+    data = read_file(path)
+    try:
+        sample = bytes(data)
+    finally:
+        if hasattr(data, 'close'):
+            data.close()
+    result['detect_encoding_ms'] = median_ms(lambda: detect_encoding(sample), repeat)
+
+    gc.collect()
+    tracemalloc.start()
+    load_timeline(path, use_cache=False)
+    result['peak_memory_mb'] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    tracemalloc.stop()
+    return result
+
+
+def bench_playback(timeline):
+    # Per-tick cost of the engine at the start, middle and end of the file, as if polled every TICK_MS
+    result = {}
+    clock = VirtualClock()
+    engine = SubtitleEngine(clock)
+    engine.subscribe(lambda cues: [cue.display_text for cue in cues])
+    engine.set_timeline(timeline)
+    span = max(timeline.end_time - TICKS * TICK_MS, 0)
+    for name, position in (('start', 0), ('middle', span // 2), ('end', span)):
+        clear_render_caches()
+        engine.play(position)
+        started = time.perf_counter()
+        for _ in range(TICKS):
+            clock.advance(TICK_MS)
+            engine.update()
+        result[f'tick_{name}_us'] = (time.perf_counter() - started) * 1e6 / TICKS
+        started = time.perf_counter()
+        for _ in range(TICKS):
+            timeline.active_indices(position)
+        result[f'lookup_{name}_us'] = (time.perf_counter() - started) * 1e6 / TICKS
+
+    rng = random.Random(1)
+    targets = [rng.randint(0, timeline.end_time) for _ in range(SEEKS)]
+    started = time.perf_counter()
+    for target in targets:
+        engine.seek(target)
+    result['seek_us'] = (time.perf_counter() - started) * 1e6 / SEEKS
+    engine.pause()
+    return result
+
+
+def bench_list(timeline, repeat):
+    # Time to hand the cues to the list view and paint the visible rows, using the real model
+    from PyQt6.QtWidgets import QApplication, QListView
+    from subtitle_reader import SubtitleListModel
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    view = QListView()
+    view.setUniformItemSizes(True)
+    view.resize(400, 600)
+    model = SubtitleListModel(view)
+    view.setModel(model)
+    view.show()
+
+    def populate():
+        clear_render_caches()
+        model.set_timeline(None)
+        model.set_timeline(timeline)
+        view.scrollTo(model.index(len(timeline) - 1))
+        app.processEvents()
+
+    result = {'list_population_ms': median_ms(populate, repeat)}
+    view.close()
+    return result
+
+
+def run(args):
+    corpus_dir = args.corpus_dir or os.path.join(tempfile.gettempdir(), 'subtitle_benchmark_corpus')
+    results = {}
+    for subtitle_format in args.formats:
+        for count in args.sizes:
+            path = ensure_corpus(corpus_dir, subtitle_format, count, args.overlap, args.tag_density, args.encoding)
+            key = f"{subtitle_format}/{count}/{args.encoding}"
+            print(f"Benchmarking {key} ({os.path.basename(path)})", file=sys.stderr)
+            repeat = args.repeat if count < 1000000 else 1
+            result = bench_load(path, repeat)
+            timeline = load_timeline(path)
+            result.update(bench_playback(timeline))
+            if not args.no_gui:
+                result.update(bench_list(timeline, repeat))
+            results[key] = {name: round(value, 3) for name, value in result.items()}
+    return results
+
+
+def compare(results, baseline, threshold, min_delta):
+    # Every metric is lower-is-better; tiny absolute changes are ignored as noise
+    regressions = []
+    for key, metrics in results.items():
+        for name, value in metrics.items():
+            previous = baseline.get(key, {}).get(name)
+            if previous is None:
+                continue
+            if value > previous * (1 + threshold) and value - previous > min_delta:
+                regressions.append(f"{key} {name}: {value} (baseline {previous})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark loading, lookup, seeking and list population on synthetic subtitle files")
+    parser.add_argument('--formats', nargs='+', default=['srt', 'vtt', 'ass'], choices=['srt', 'vtt', 'ass'])
+    parser.add_argument('--sizes', nargs='+', type=int, default=[1000, 10000, 100000])
+    parser.add_argument('--overlap', type=float, default=0.1, help="Fraction of cues overlapping the next one")
+    parser.add_argument('--tag-density', type=float, default=0.1, help="Chance of an ASS override tag per word")
+    parser.add_argument('--encoding', default='utf-8', help="Encoding of the generated files, e.g. cp1252 or shift_jis")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--corpus-dir', help="Where generated files are kept between runs")
+    parser.add_argument('--no-gui', action='store_true', help="Skip the list view benchmark")
+    parser.add_argument('--output', help="Write the results to this JSON file")
+    parser.add_argument('--baseline', help="Compare against a JSON file written by --output")
+    parser.add_argument('--threshold', type=float, default=0.2, help="Allowed slowdown against the baseline (0.2 = 20%%)")
+    parser.add_argument('--min-delta', type=float, default=0.05, help="Ignore regressions smaller than this, in the metric's unit")
+    args = parser.parse_args()
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    # Keep the benchmark's cue cache out of the user's
+    os.environ['XDG_CACHE_HOME'] = os.environ['LOCALAPPDATA'] = os.path.join(tempfile.gettempdir(), 'subtitle_benchmark_cache')
+
+    results = run(args)
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_delta)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
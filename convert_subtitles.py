@@ -0,0 +1,122 @@
+import argparse
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from subtitle_loader import SUPPORTED_EXTENSIONS, load_timeline
+from subtitle_timing import parse_retime, retime_timeline
+from subtitle_writers import write_cues, write_retimed_source
+
+# Headless batch conversion. Nothing here may import Qt, so it starts quickly on servers.
+
+
+def find_subtitle_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, _, file_names in os.walk(path):
+                for file_name in sorted(file_names):
+                    if os.path.splitext(file_name)[1].lower() in SUPPORTED_EXTENSIONS:
+                        yield path, os.path.join(directory, file_name)
+        else:
+            yield os.path.dirname(path), path
+
+
+def output_path(root, file_name, output_dir, extension):
+    # Mirrors the input tree below output_dir
+    relative = os.path.relpath(file_name, root) if root else os.path.basename(file_name)
+    return os.path.join(output_dir, os.path.splitext(relative)[0] + extension)
+
+
+def convert_file(file_name, target, extension, keep_markup, scale, shift):
+    # Runs in a worker process; any error is returned so one bad file never stops the batch
+    started = time.perf_counter()
+    try:
+        os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+        if keep_markup and os.path.splitext(file_name)[1].lower() == extension:
+            # Same format: copy the file's own text with new timestamps, so no markup is lost
+            count = write_retimed_source(file_name, target, scale, shift)
+        else:
+            timeline = load_timeline(file_name, use_cache=False)
+            if scale != 1.0 or shift != 0.0:
+                timeline = retime_timeline(timeline, scale, shift)
+            write_cues(target, timeline, extension, keep_markup)
+            count = len(timeline)
+        return file_name, target, count, os.path.getsize(file_name), None, time.perf_counter() - started
+    except Exception as e:
+        return file_name, target, 0, 0, f"{type(e).__name__}: {e}", time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convert, normalize and retime subtitle files in bulk",
+        epilog="Files written in their own format are copied with only their timestamps changed. Converting to "
+               "another format keeps only bold, italic, underline and strikeout: SRT <font> colors, ASS styles, "
+               "positioning (\\pos, \\an), karaoke and other override tags are lost.")
+    parser.add_argument('inputs', nargs='+', help="Subtitle files or directories (searched recursively)")
+    parser.add_argument('-o', '--output-dir', required=True)
+    parser.add_argument('--to', choices=['srt', 'vtt', 'ass'],
+                        help="Output format (default: same as input). Other formats lose most markup, see below")
+    parser.add_argument('--strip-markup', action='store_true', help="Remove all styling tags")
+    parser.add_argument('--shift', type=int, default=0, help="Milliseconds added to every timestamp")
+    parser.add_argument('--scale', type=float, default=1.0, help="Factor every timestamp is multiplied by (applied before --shift)")
+    parser.add_argument('--retime', metavar='SPEC',
+                        help="Retime like the viewer's Retime... dialog instead of --shift/--scale: "
+                             "'shift MS', 'scale FACTOR', 'fps FROM TO' or 'sync OLD=NEW OLD=NEW'")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument('-v', '--verbose', action='store_true')
+    args = parser.parse_args()
+    scale, shift = args.scale, float(args.shift)
+    if args.retime:
+        if args.shift or args.scale != 1.0:
+            parser.error("--retime cannot be combined with --shift or --scale")
+        try:
+            scale, shift = parse_retime(args.retime)
+        except ValueError as e:
+            parser.error(str(e))
+    elif scale <= 0:
+        parser.error("--scale must be positive")
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+
+    jobs = []
+    targets = set()
+    for root, file_name in find_subtitle_files(args.inputs):
+        extension = '.' + args.to if args.to else os.path.splitext(file_name)[1].lower()
+        if extension == '.ssa' and args.strip_markup:
+            extension = '.ass'  # SSA is only copied; regenerated files are written as ASS
+        target = output_path(root, file_name, args.output_dir, extension)
+        if target in targets:
+            # e.g. movie.srt and movie.vtt both converted to SRT: keep the source extension in the name
+            target = os.path.splitext(target)[0] + os.path.splitext(file_name)[1].lower() + extension
+        targets.add(target)
+        jobs.append((file_name, target, extension, not args.strip_markup, scale, shift))
+    if not jobs:
+        print("No subtitle files found", file=sys.stderr)
+        sys.exit(1)
+
+    started = time.perf_counter()
+    converted = failed = cues = size = 0
+    with ProcessPoolExecutor(max_workers=max(1, min(args.jobs, len(jobs)))) as pool:
+        futures = [pool.submit(convert_file, *job) for job in jobs]
+        for future in as_completed(futures):
+            file_name, target, count, file_size, error, elapsed = future.result()
+            if error:
+                failed += 1
+                print(f"FAILED {file_name}: {error}", flush=True)
+            else:
+                converted += 1
+                cues += count
+                size += file_size
+                note = f"{count} cues" if count else "no cues found"
+                print(f"{file_name} -> {target} ({note}, {elapsed * 1000:.0f} ms)", flush=True)
+
+    elapsed = time.perf_counter() - started
+    print(f"{converted} converted, {failed} failed in {elapsed:.2f} s: "
+          f"{converted / elapsed:.1f} files/s, {cues / elapsed:.0f} cues/s, {size / elapsed / 1e6:.1f} MB/s")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,18 +1,16 @@
 import sys
 import logging
 from PyQt6.QtWidgets import QApplication
-from subtitle_reader import SubtitleReader
+from subtitle_reader import SubtitleReader, configure_logging
 
 def main():
-    logging.basicConfig(level=logging.INFO, 
-                        format='%(asctime)s - %(levelname)s - %(message)s',
-                        filename='subtitle_viewer.log',
-                        filemode='w')
+    configure_logging(level=logging.INFO, filename='subtitle_viewer.log')
     logging.info("Starting application from launch_subtitle_viewer.py")
     app = QApplication(sys.argv)
     logging.info("Created QApplication")
     ex = SubtitleReader()
     logging.info("Created SubtitleReader")
+    ex.apply_arguments(app.arguments())
     sys.exit(app.exec())
 
 if __name__ == '__main__':
@@ -0,0 +1,164 @@
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import sys
+from array import array
+from subtitle_cues import Cue, CueTimeline
+
+# Bump whenever parsing or the file layout changes so older entries are ignored
+CACHE_VERSION = 1
+CACHE_MAGIC = b'SUBCUES\0'
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+CACHE_SUFFIX = '.cues'
+
+# magic, version, byte order mark, cue count, index size, end time, in-order flag, content digest
+HEADER = struct.Struct('=8sIIIIiI32s')
+BYTE_ORDER_MARK = 1 if sys.byteorder == 'little' else 2
+
+
+def cache_directory():
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return os.path.join(base, 'SubtitleViewer', 'cues')
+
+
+def content_digest(data):
+    digest = hashlib.blake2b(digest_size=32)
+    for offset in range(0, len(data), 1024 * 1024):
+        digest.update(data[offset:offset + 1024 * 1024])
+    return digest.digest()
+
+
+def cache_path(file_name):
+    stat = os.stat(file_name)
+    key = f"{os.path.abspath(file_name)}|{stat.st_size}|{stat.st_mtime_ns}|{CACHE_VERSION}"
+    return os.path.join(cache_directory(), hashlib.sha1(key.encode('utf-8')).hexdigest() + CACHE_SUFFIX)
+
+
+class CachedCues:
+    # Cue sequence over the mapped columns; a Cue object only exists while something holds it
+    def __init__(self, starts, ends, offsets, blob):
+        self.starts = starts
+        self.ends = ends
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self.starts)
+        if not 0 <= index < len(self.starts):
+            raise IndexError(index)
+        text = str(self.blob[self.offsets[index]:self.offsets[index + 1]], 'utf-8')
+        return Cue(self.starts[index], self.ends[index], text)
+
+    def __iter__(self):
+        for index in range(len(self.starts)):
+            yield self[index]
+
+    def texts(self):
+        # The cue texts alone, without building a Cue for each
+        offsets = self.offsets.tolist()
+        if len(offsets) < 2:
+            return []
+        base = offsets[0]
+        blob = bytes(self.blob[base:offsets[-1]])  # One copy, then slices of local bytes
+        return [str(blob[start - base:end - base], 'utf-8') for start, end in zip(offsets, offsets[1:])]
+
+
+def load_cached_timeline(file_name, data):
+    path = cache_path(file_name)
+    try:
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        magic, version, byte_order, count, index_size, end_time, in_order, digest = HEADER.unpack_from(mapped)
+        if (magic != CACHE_MAGIC or version != CACHE_VERSION or byte_order != BYTE_ORDER_MARK
+                or digest != content_digest(data)):
+            raise ValueError("stale entry")
+        columns_size = 4 * (3 * count + 2 * index_size + 1)
+        if len(mapped) < HEADER.size + columns_size:
+            raise ValueError("truncated entry")
+    except (struct.error, ValueError):
+        mapped.close()
+        logging.info("Discarding invalid cue cache entry for %s", file_name)
+        remove_entry(path)
+        return None
+
+    view = memoryview(mapped)
+    position = HEADER.size
+
+    def column(length, typecode):
+        nonlocal position
+        start = position
+        position += length * 4
+        return view[start:position].cast(typecode)
+
+    starts = column(count, 'i')
+    ends = column(count, 'i')
+    tree = column(2 * index_size, 'i')
+    offsets = column(count + 1, 'I')
+    blob = view[position:]
+    os.utime(path)  # Marks the entry as recently used for eviction
+    cues = CachedCues(starts, ends, offsets, blob)
+    return CueTimeline.from_columns(cues, starts, ends, tree, end_time, bool(in_order))
+
+
+def store_timeline(file_name, data, timeline):
+    import tempfile  # Only needed once a file has been parsed
+    texts = [cue.text.encode('utf-8') for cue in timeline]
+    offsets = array('I', [0])
+    total = 0
+    for text in texts:
+        total += len(text)
+        offsets.append(total)
+
+    directory = cache_directory()
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(CACHE_MAGIC, CACHE_VERSION, BYTE_ORDER_MARK, len(timeline),
+                                timeline.index_size, timeline.end_time, int(timeline.in_order),
+                                content_digest(data)))
+            f.write(array('i', timeline.starts).tobytes())
+            f.write(array('i', timeline.ends).tobytes())
+            f.write(array('i', timeline.max_end_tree).tobytes())
+            f.write(offsets.tobytes())
+            for text in texts:
+                f.write(text)
+        os.replace(temp_path, cache_path(file_name))
+    except OSError:
+        remove_entry(temp_path)
+        raise
+    evict_entries(directory)
+
+
+def remove_entry(path):
+    try:
+        os.remove(path)
+    except OSError:  # Already gone, or still mapped by a loaded timeline on Windows
+        pass
+
+
+def evict_entries(directory, max_bytes=CACHE_MAX_BYTES):
+    entries = []
+    for entry in os.scandir(directory):
+        if entry.name.endswith(CACHE_SUFFIX):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        remove_entry(path)
+        total -= size
@@ -0,0 +1,106 @@
+import math
+from collections import OrderedDict
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QAbstractTextDocumentLayout, QColor, QFont, QPainter, QPalette, QPixmap, QTextDocument, QTextOption
+from PyQt6.QtWidgets import QWidget
+
+PIXMAP_CACHE_SIZE = 16
+
+
+class SubtitleCanvas(QWidget):
+    # Paints rich cue text from pre-rendered pixmaps. Text is laid out once per font, color and
+    # width, so showing a prepared cue is a single blit instead of a QLabel re-layout and
+    # style sheet polish at the moment the cue appears.
+    def __init__(self, parent=None, align_top=False, margin=0, background=None):
+        super().__init__(parent)
+        self.align_top = align_top
+        self.margin = margin
+        self.background = background
+        self.subtitle_font = QFont()  # Not self.font, which would hide QWidget.font()
+        self.color = QColor('white')
+        self.text = ''
+        self.pixmaps = OrderedDict()  # Rich text -> QPixmap, least recently used first
+        self.rendered_width = None
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent, background is not None)
+
+    def set_font(self, font):
+        self.subtitle_font = QFont(font)
+        self.setFont(self.subtitle_font)
+        self.invalidate()
+
+    def set_color(self, color):
+        self.color = QColor(color)
+        self.invalidate()
+
+    def set_background(self, color):
+        # Only the fill changes, the cached text stays valid
+        self.background = QColor(color)
+        self.update()
+
+    def invalidate(self):
+        self.pixmaps.clear()
+        self.update()
+
+    def show_text(self, text):
+        if text != self.text:
+            self.text = text
+            self.update()
+
+    def show_cues(self, cues):
+        self.show_text('<br>'.join(cue.display_text for cue in cues))
+
+    def prepare(self, texts):
+        # Lays out text that will be shown soon, e.g. at the next few cue boundaries
+        for text in texts:
+            if text:
+                self.pixmap(text)
+
+    def pixmap(self, text):
+        if self.rendered_width != self.width():
+            self.pixmaps.clear()
+            self.rendered_width = self.width()
+        pixmap = self.pixmaps.get(text)
+        if pixmap is None:
+            pixmap = self.render_text(text)
+            self.pixmaps[text] = pixmap
+            if len(self.pixmaps) > PIXMAP_CACHE_SIZE:
+                self.pixmaps.popitem(last=False)
+        else:
+            self.pixmaps.move_to_end(text)
+        return pixmap
+
+    def render_text(self, text):
+        document = QTextDocument()
+        document.setDefaultFont(self.subtitle_font)
+        document.setDocumentMargin(0)
+        document.setDefaultTextOption(QTextOption(Qt.AlignmentFlag.AlignHCenter))
+        document.setHtml(text)
+        document.setTextWidth(self.width())
+        # The pixmap only covers the text, not the whole width of a 4K screen
+        width = max(math.ceil(document.idealWidth()), 1)
+        document.setTextWidth(width)
+        height = max(math.ceil(document.size().height()), 1)
+
+        ratio = self.devicePixelRatioF()
+        pixmap = QPixmap(math.ceil(width * ratio), math.ceil(height * ratio))
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.RenderHint.TextAntialiasing)
+        context = QAbstractTextDocumentLayout.PaintContext()
+        context.palette.setColor(QPalette.ColorRole.Text, self.color)
+        document.documentLayout().draw(painter, context)
+        painter.end()
+        return pixmap
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        if self.background is not None:
+            painter.fillRect(self.rect(), self.background)
+        if self.text:
+            pixmap = self.pixmap(self.text)
+            size = pixmap.deviceIndependentSize()
+            x = (self.width() - size.width()) / 2
+            y = self.margin if self.align_top else self.height() - self.margin - size.height()
+            painter.drawPixmap(int(x), int(y), pixmap)
+        painter.end()
@@ -0,0 +1,244 @@
+from bisect import bisect_right
+from subtitle_text import render_rich_text
+
+
+class Cue:
+    __slots__ = ('start', 'end', 'text')
+
+    def __init__(self, start, end, text):
+        self.start = start  # milliseconds
+        self.end = end  # milliseconds
+        self.text = text
+
+    @property
+    def display_text(self):
+        # Rendered once per distinct text and then served from the render cache
+        return render_rich_text(self.text)
+
+    def __repr__(self):
+        return f"Cue({self.start}, {self.end}, {self.text!r})"
+
+
+class CueTimeline:
+    def __init__(self, cues):
+        cues = list(cues)
+        # True when the cues arrived in start order, so a timeline built from more of the
+        # same stream keeps every earlier cue at its index
+        self.in_order = all(a.start <= b.start for a, b in zip(cues, cues[1:]))
+        # Cues are kept in start order so list rows, lookups and seeks agree on indices
+        self.cues = cues if self.in_order else sorted(cues, key=lambda cue: cue.start)
+        self.starts = [cue.start for cue in self.cues]
+        self.ends = [cue.end for cue in self.cues]
+        self.end_time = max(self.ends, default=0)
+        self.build_index()
+
+    @classmethod
+    def from_columns(cls, cues, starts, ends, max_end_tree, end_time, in_order):
+        # Wraps prebuilt columns (e.g. arrays mapped from the cue cache) without copying them
+        timeline = cls.__new__(cls)
+        timeline.cues = cues
+        timeline.starts = starts
+        timeline.ends = ends
+        timeline.end_time = end_time
+        timeline.in_order = in_order
+        timeline.index_size = len(max_end_tree) // 2
+        timeline.max_end_tree = max_end_tree
+        return timeline
+
+    def build_index(self):
+        # Segment tree of maximum end times over the start-ordered cues, used for stabbing queries
+        size = 1
+        while size < len(self.cues):
+            size *= 2
+        tree = [-1] * (2 * size)
+        tree[size:size + len(self.ends)] = self.ends
+        # One level at a time, so the pairwise maxima are taken by map instead of a Python loop
+        level = size
+        while level > 1:
+            tree[level // 2:level] = map(max, tree[level:2 * level:2], tree[level + 1:2 * level:2])
+            level //= 2
+        self.index_size = size
+        self.max_end_tree = tree
+
+    def patched(self, first, removed, cues):
+        # A new timeline with self[first:first + removed] replaced by cues (all in start order).
+        # Only the seams are checked for order, and when the number of cues is unchanged the
+        # index is updated along the changed leaves instead of being rebuilt.
+        old = self.cues if isinstance(self.cues, list) else list(self.cues)
+        cues = list(cues)
+        new_cues = old[:first] + cues + old[first + removed:]
+        seam = old[max(first - 1, 0):first] + cues + old[first + removed:first + removed + 1]
+        if not self.in_order or not all(a.start <= b.start for a, b in zip(seam, seam[1:])):
+            return CueTimeline(new_cues)
+
+        timeline = CueTimeline.__new__(CueTimeline)
+        timeline.cues = new_cues
+        timeline.in_order = True
+        timeline.starts = list(self.starts[:first]) + [cue.start for cue in cues] + list(self.starts[first + removed:])
+        timeline.ends = list(self.ends[:first]) + [cue.end for cue in cues] + list(self.ends[first + removed:])
+        timeline.end_time = max(timeline.ends, default=0)
+        if len(cues) != removed:
+            timeline.build_index()
+            return timeline
+        timeline.index_size = self.index_size
+        timeline.max_end_tree = list(self.max_end_tree)
+        timeline.update_index(first, first + len(cues))
+        return timeline
+
+    def update_index(self, first, end):
+        # Refreshes the leaves of cues first..end - 1 and the paths above them
+        tree = self.max_end_tree
+        for index in range(first, end):
+            node = self.index_size + index
+            tree[node] = self.ends[index]
+            node //= 2
+            while node:
+                tree[node] = max(tree[2 * node], tree[2 * node + 1])
+                node //= 2
+
+    def can_extend(self, cues):
+        # The timeline and cues would still be in start order with cues appended
+        return isinstance(self.cues, list) and self.in_order and all(
+            a.start <= b.start for a, b in zip(self.cues[-1:] + cues, cues))
+
+    def extend(self, cues):
+        # Appends cues in place, for a timeline that grows at the end (live input): O(k log n)
+        # for k cues, plus a rebuild whenever the index doubles. Only valid when can_extend(cues).
+        first = len(self.cues)
+        self.cues.extend(cues)
+        self.starts.extend(cue.start for cue in cues)
+        self.ends.extend(cue.end for cue in cues)
+        self.end_time = max(self.ends[first:] + [self.end_time])
+        if len(self.cues) > self.index_size:
+            self.build_index()
+        else:
+            self.update_index(first, len(self.cues))
+
+    def __len__(self):
+        return len(self.cues)
+
+    def __getitem__(self, index):
+        return self.cues[index]
+
+    def __iter__(self):
+        return iter(self.cues)
+
+    def active_indices(self, time):
+        # Every cue with start <= time < end, in start order, in O(log n + k) for k active cues
+        limit = bisect_right(self.starts, time)
+        tree = self.max_end_tree
+        result = []
+        stack = [(1, 0, self.index_size)]
+        while stack:
+            node, lo, width = stack.pop()
+            if lo >= limit or tree[node] <= time:
+                continue
+            if width == 1:
+                result.append(lo)
+                continue
+            half = width // 2
+            stack.append((2 * node + 1, lo + half, half))
+            stack.append((2 * node, lo, half))
+        return result
+
+    def next_start_index(self, time):
+        # Index of the first cue starting strictly after time (len(self) if there is none)
+        return bisect_right(self.starts, time)
+
+
+class CueCursor:
+    # Jumps over more cue starts than this are handled as a seek through the index
+    MAX_ADVANCE = 64
+
+    def __init__(self, timeline):
+        self.timeline = timeline
+        self.seek(0)
+
+    def seek(self, time):
+        self.time = time
+        self.active = self.timeline.active_indices(time)
+        self.next_index = self.timeline.next_start_index(time)
+        self.update_next_boundary()
+
+    def update_next_boundary(self):
+        timeline = self.timeline
+        boundary = timeline.starts[self.next_index] if self.next_index < len(timeline) else None
+        for index in self.active:
+            end = timeline.ends[index]
+            if boundary is None or end < boundary:
+                boundary = end
+        self.next_boundary = boundary
+
+    def advance(self, time):
+        # Moves the cursor to time and returns True if the set of active cues changed.
+        # Forward playback between cue boundaries costs a single comparison.
+        if time < self.time:
+            previous = self.active
+            self.seek(time)
+            return self.active != previous
+        self.time = time
+        if self.next_boundary is None or time < self.next_boundary:
+            return False
+
+        timeline = self.timeline
+        starts, ends = timeline.starts, timeline.ends
+        stop = self.next_index + self.MAX_ADVANCE
+        if stop < len(timeline) and starts[stop] <= time:
+            previous = self.active
+            self.seek(time)
+            return self.active != previous
+
+        active = [index for index in self.active if ends[index] > time]
+        changed = len(active) != len(self.active)
+        while self.next_index < len(timeline) and starts[self.next_index] <= time:
+            if ends[self.next_index] > time:
+                active.append(self.next_index)
+                changed = True
+            self.next_index += 1
+        self.active = active
+        self.update_next_boundary()
+        return changed
+
+    def active_cues(self):
+        cues = self.timeline.cues
+        return [cues[index] for index in self.active]
+
+
+def time_to_milliseconds(value):
+    if isinstance(value, str):
+        value = value.strip()
+        if ':' not in value:  # Assume it's already in milliseconds
+            return int(float(value))
+        parts = value.replace(',', '.').split(':')
+        if len(parts) == 2:  # WebVTT allows MM:SS.mmm
+            parts.insert(0, '0')
+        h, m, s = parts
+        s, _, fraction = s.partition('.')
+        # Centiseconds (ASS/SSA) and milliseconds (SRT/VTT) both pad out to milliseconds
+        ms = int(fraction.ljust(3, '0')[:3]) if fraction else 0
+        return (int(h) * 3600 + int(m) * 60 + int(s)) * 1000 + ms
+    if hasattr(value, 'ordinal'):  # pysrt SubRipTime
+        return value.ordinal
+    if hasattr(value, 'total_seconds'):  # ass uses timedelta
+        return round(value.total_seconds() * 1000)
+    return int(value)
+
+
+def format_timestamp(ms):
+    seconds, ms = divmod(ms, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{ms:03d}"
+
+
+def to_cue(subtitle):
+    # Normalizes pysrt items, ass events, webvtt captions and plain-text SSA dicts
+    if isinstance(subtitle, dict):
+        start, end, text = subtitle['start'], subtitle['end'], subtitle['text']
+    else:
+        start, end, text = subtitle.start, subtitle.end, subtitle.text
+    return Cue(time_to_milliseconds(start), time_to_milliseconds(end), text)
+
+
+def build_timeline(subtitles):
+    return CueTimeline(to_cue(subtitle) for subtitle in subtitles)
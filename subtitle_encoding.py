@@ -0,0 +1,77 @@
+import codecs
+import os
+from subtitle_parsers import iter_chunks
+
+# UTF-32 LE must be checked before UTF-16 LE, whose BOM is a prefix of it
+BOMS = [
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+CHARDET_SAMPLE_SIZE = 64 * 1024
+ENCODING_CACHE_SIZE = 256
+
+encoding_cache = {}
+
+
+def decode_error_offset(data, encoding):
+    # Offset of the first byte that does not decode strictly, or None when all of it does
+    decoder = codecs.getincrementaldecoder(encoding)()
+    offset = 0
+    chunk = b''
+    try:
+        for chunk in iter_chunks(data):
+            decoder.decode(chunk)
+            offset += len(chunk)
+        chunk = b''
+        decoder.decode(b'', final=True)
+    except UnicodeDecodeError as e:
+        # e.object is the chunk with any bytes the decoder held back from the previous one in front
+        return max(0, offset - (len(e.object) - len(chunk)) + e.start)
+    return None
+
+
+def is_utf8(data):
+    return decode_error_offset(data, 'utf-8') is None
+
+
+def detect_encoding(data):
+    # BOMs first, then a strict UTF-8 check (fast, in C), and chardet only on a bounded sample
+    for bom, encoding in BOMS:
+        if data[:len(bom)] == bom:
+            return encoding
+    error_offset = decode_error_offset(data, 'utf-8')
+    if error_offset is None:
+        return 'utf-8'
+    # chardet is slow to import and rarely needed, so it is loaded on first use. The sample
+    # starts just before the first byte that is not UTF-8: files are mostly ASCII, and a sample
+    # from the start of the file would often see none of the bytes that tell encodings apart.
+    import chardet
+    start = max(0, error_offset - CHARDET_SAMPLE_SIZE // 2)
+    encoding = chardet.detect(bytes(data[start:start + CHARDET_SAMPLE_SIZE]))['encoding']
+    if encoding and encoding.lower() == 'ascii':
+        encoding = None  # Cannot be right, the file has a byte above 0x7f
+    # The rest of the file must decode too, or the parse would fail part way. cp1252 covers
+    # most Western files; latin-1 decodes any byte sequence, so the load never fails here.
+    for candidate in (encoding, 'cp1252'):
+        if candidate and decode_error_offset(data, candidate) is None:
+            return candidate
+    return 'latin-1'
+
+
+def file_cache_key(file_name):
+    stat = os.stat(file_name)
+    return os.path.abspath(file_name), stat.st_size, stat.st_mtime_ns
+
+
+def detect_file_encoding(file_name, data):
+    key = file_cache_key(file_name)
+    encoding = encoding_cache.get(key)
+    if encoding is None:
+        encoding = detect_encoding(data)
+        if len(encoding_cache) >= ENCODING_CACHE_SIZE:
+            encoding_cache.pop(next(iter(encoding_cache)), None)
+        encoding_cache[key] = encoding
+    return encoding
@@ -0,0 +1,234 @@
+import heapq
+import logging
+import math
+import time
+from subtitle_cues import CueCursor
+
+MIN_RATE = 0.25
+MAX_RATE = 4.0
+
+
+class MonotonicClock:
+    # perf_counter rather than monotonic: on Windows the latter only ticks every ~15.6 ms
+    def now(self):
+        return time.perf_counter_ns() // 1000000  # milliseconds
+
+
+class VirtualClock:
+    # Only moves when advanced, so hours of playback can be simulated in milliseconds
+    def __init__(self, now=0):
+        self.time = now
+
+    def now(self):
+        return self.time
+
+    def advance(self, ms):
+        self.time += ms
+
+
+class PlaybackTrack:
+    # One subtitle file on the engine's clock: its timeline, cursor and listeners
+    def __init__(self, timeline, listeners=None):
+        self.timeline = timeline
+        self.cursor = CueCursor(timeline)
+        self.listeners = [] if listeners is None else listeners
+        self.published = None
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        self.listeners.remove(listener)
+
+    def publish(self):
+        key = tuple(self.cursor.active)
+        if key == self.published:
+            return
+        self.published = key
+        cues = self.cursor.active_cues()
+        for listener in self.listeners:
+            listener(cues)
+
+
+class SubtitleEngine:
+    # Owns the tracks, their cursors and the playback position, with no GUI dependency.
+    # Track 0 is the main file; engine listeners are its listeners and are called with the
+    # list of active cues whenever that set changes. Further tracks play on the same clock.
+    # The position is never accumulated from timer ticks: it is always computed as
+    # anchor_position + rate * (now - anchor_time), and re-anchored on play, pause, seek and
+    # rate changes, so rounding errors cannot build up over a long session.
+    def __init__(self, clock=None):
+        self.clock = clock or MonotonicClock()
+        self.tracks = []
+        self.boundaries = []  # Heap of (next boundary, track index), one entry per track
+        self.end_time = 0
+        self.looping = True  # Off for live input, where playing past the last cue waits for more
+        self.playing = False
+        self.rate = 1.0
+        self.anchor_position = 0
+        self.anchor_time = 0
+        self.position = 0
+        self.listeners = []
+        self.stats = None  # A PlaybackStats while timing instrumentation is on
+
+    @property
+    def timeline(self):
+        return self.tracks[0].timeline if self.tracks else None
+
+    @property
+    def cursor(self):
+        return self.tracks[0].cursor if self.tracks else None
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        self.listeners.remove(listener)
+
+    def set_timeline(self, timeline, keep_position=False):
+        # Replaces the main track; keep_position is for a larger snapshot of the file that is
+        # already playing. Other tracks keep playing.
+        track = PlaybackTrack(timeline, self.listeners)
+        if self.tracks:
+            self.tracks[0] = track
+        else:
+            self.tracks.append(track)
+        if not keep_position:
+            self.anchor(0)
+        self.seek_tracks(self.position)
+        self.update()
+        self.publish()
+
+    def add_track(self, timeline):
+        # The timeline was sorted and indexed when it was built, so adding it only costs a seek
+        if not self.tracks:
+            self.set_timeline(timeline)
+            return self.tracks[0]
+        track = PlaybackTrack(timeline)
+        track.cursor.seek(self.current_position())
+        self.tracks.append(track)
+        self.rebuild_boundaries()
+        return track
+
+    def remove_track(self, track):
+        if track is self.tracks[0]:
+            raise ValueError("The main track cannot be removed")
+        self.tracks.remove(track)
+        self.rebuild_boundaries()
+
+    def seek_tracks(self, position):
+        for track in self.tracks:
+            track.cursor.seek(position)
+        self.rebuild_boundaries()
+
+    def rebuild_boundaries(self):
+        self.boundaries = [(track.cursor.next_boundary, index) for index, track in enumerate(self.tracks)
+                           if track.cursor.next_boundary is not None]
+        heapq.heapify(self.boundaries)
+        self.end_time = max(track.timeline.end_time for track in self.tracks)
+
+    def anchor(self, position):
+        self.anchor_position = position
+        self.anchor_time = self.clock.now()
+        self.position = position
+
+    def current_position(self, now=None):
+        if not self.playing:
+            return self.anchor_position
+        if now is None:
+            now = self.clock.now()
+        return self.anchor_position + int(self.rate * (now - self.anchor_time))
+
+    def play(self, position=None):
+        # Resumes from the paused position unless a position is given
+        if not self.timeline:
+            return
+        if position is None:
+            position = self.anchor_position
+        self.playing = True
+        for track in self.tracks:
+            track.published = None  # Subscribers may have shown something else while stopped
+        self.seek(position)
+
+    def pause(self):
+        self.update()
+        self.anchor(self.current_position())
+        self.playing = False
+        if self.stats:
+            self.stats.stop_segment()
+
+    def seek(self, position):
+        # Each cursor finds its active cues with a binary search over its cue index
+        self.anchor(position)
+        self.seek_tracks(position)
+        self.publish()
+        if self.stats and self.playing:
+            self.stats.start_segment(position)
+
+    def sync(self, position):
+        # Moves playback to a position reported by an external clock. Forward corrections go
+        # through the boundary heap like normal playback; backward ones need a seek.
+        if position < self.position:
+            self.seek(position)
+            return
+        self.anchor(position)
+        self.update()
+
+    def set_rate(self, rate):
+        rate = min(max(rate, MIN_RATE), MAX_RATE)
+        if self.playing:
+            self.anchor(self.current_position())
+            if self.stats:
+                self.stats.start_segment(self.position)
+        self.rate = rate
+
+    def update(self):
+        # Moves the position to where the clock says playback is now
+        if not self.timeline or not self.playing:
+            return
+        now = self.clock.now()
+        self.position = self.current_position(now)
+
+        # Only cue boundaries change what is shown. The heap merges the boundaries of all
+        # tracks, so only the tracks with a boundary that has passed are touched.
+        boundaries = self.boundaries
+        while boundaries and boundaries[0][0] <= self.position:
+            boundary, index = heapq.heappop(boundaries)
+            track = self.tracks[index]
+            if track.cursor.advance(self.position):
+                track.publish()
+                if self.stats:
+                    # How far past the boundary the cues were actually handed to the listeners
+                    self.stats.record_lateness((self.position - boundary) / self.rate + self.clock.now() - now)
+            if track.cursor.next_boundary is not None:
+                heapq.heappush(boundaries, (track.cursor.next_boundary, index))
+        if self.stats:
+            self.stats.record_position(self.position, self.rate)
+
+        # Loop back to the beginning if we've reached the end
+        if self.looping and self.position > self.end_time:
+            self.seek(0)
+            logging.info("Subtitle playback looped to beginning")
+
+    def next_boundary(self):
+        # The next cue start or end on any track, or the loop point after the last cue
+        # (None when not looping and every cue has ended)
+        if self.boundaries:
+            return self.boundaries[0][0]
+        return self.end_time + 1 if self.looping else None
+
+    def time_until_next_boundary(self):
+        # Wall clock time, rounded up so a timer never wakes just before the boundary. Measured
+        # from the clock rather than self.position, which is only as recent as the last update()
+        # (adding or removing a track mid-gap reschedules without one).
+        boundary = self.next_boundary()
+        if boundary is None:
+            return None
+        return max(0, math.ceil((boundary - self.current_position()) / self.rate))
+
+    def active_cues(self):
+        return self.cursor.active_cues() if self.cursor else []
+
+    def publish(self):
+        for track in self.tracks:
+            track.publish()
@@ -0,0 +1,169 @@
+import codecs
+import logging
+import mmap
+import os
+import io
+import time
+import traceback
+from subtitle_cache import load_cached_timeline, store_timeline
+from subtitle_cues import CueTimeline, build_timeline
+from subtitle_encoding import detect_file_encoding
+from subtitle_matroska import read_matroska_timeline
+from subtitle_parsers import CUE_PARSERS, iter_lines
+
+SUPPORTED_EXTENSIONS = ['.srt', '.vtt', '.ass', '.ssa']
+MATROSKA_EXTENSIONS = ['.mkv', '.mks', '.webm']  # Read for their embedded text subtitle tracks
+FIRST_PARTIAL_SIZE = 256
+
+
+class LoadCancelled(Exception):
+    pass
+
+
+def parse_ssa_as_plain_text(content):
+    lines = content.split('\n')
+    subtitles = []
+    for line in lines:
+        if line.startswith('Dialogue:'):
+            parts = line.split(',')
+            if len(parts) >= 4:
+                start = parts[1].strip()
+                end = parts[2].strip()
+                text = ','.join(parts[3:]).strip()
+                subtitles.append({'start': start, 'end': end, 'text': text})
+    return subtitles
+
+
+def read_file(file_name):
+    # Maps the file once; every later stage works on this buffer instead of reopening the file
+    with open(file_name, 'rb') as f:
+        try:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):  # Empty files and streams that cannot be mapped
+            return f.read()
+
+
+def parse_with_libraries(content, file_extension):
+    # The format libraries are only needed for files the built-in parsers cannot read,
+    # so they are imported on first use instead of at startup
+    if file_extension == '.srt':
+        import pysrt
+        return pysrt.from_string(content)
+    if file_extension in ['.ass', '.ssa']:
+        import ass
+        try:
+            # Attempt to fix color format
+            content = content.replace('PrimaryColour', 'PrimaryColour: &H')
+            content = content.replace('SecondaryColour', 'SecondaryColour: &H')
+            content = content.replace('TertiaryColour', 'TertiaryColour: &H')
+            content = content.replace('BackColour', 'BackColour: &H')
+
+            parsed = ass.parse(io.StringIO(content))
+            subtitles = list(parsed.events)  # Convert EventsSection to list
+            logging.info("Loaded %s ASS/SSA subtitles", len(subtitles))
+            logging.debug("First subtitle: %s", subtitles[0] if subtitles else 'None')
+            return subtitles
+        except Exception as e:
+            logging.error("ASS/SSA parse error: %s", e)
+            logging.error("Traceback: %s", traceback.format_exc())
+            # If parsing fails, try to load as plain text
+            return parse_ssa_as_plain_text(content)
+    import webvtt
+    return list(webvtt.read_buffer(io.StringIO(content)))
+
+
+def load_timeline(file_name, progress=None, is_cancelled=None, on_partial=None, use_cache=True, track=None):
+    # Reads, decodes and parses a subtitle file into a CueTimeline, or maps it straight from the
+    # cue cache when the file has not changed since it was last parsed. Safe to run off the GUI
+    # thread: progress(percent) is called as the file is read and is_cancelled() is polled
+    # there, raising LoadCancelled when it returns True. on_partial(timeline) receives
+    # snapshots of the cues parsed so far, at geometrically growing sizes, so the first cues
+    # can be shown and played while the rest of the file is still being parsed. For Matroska
+    # files, track is the subtitle track number to read (the default text track when None).
+    def report(percent):
+        if is_cancelled and is_cancelled():
+            raise LoadCancelled(file_name)
+        if progress:
+            progress(percent)
+
+    _, file_extension = os.path.splitext(file_name)
+    file_extension = file_extension.lower()
+    if file_extension in MATROSKA_EXTENSIONS:
+        # Only the subtitle blocks are read, which is faster than hashing the whole file for the cue cache
+        started = time.perf_counter()
+        try:
+            timeline = read_matroska_timeline(file_name, track, progress=report)
+        except LoadCancelled:
+            logging.info("Loading cancelled: %s", file_name)
+            raise
+        except Exception as e:
+            logging.error("Error loading subtitles: %s", e)
+            raise
+        logging.info("Loaded %s subtitles in %.1f ms", len(timeline), (time.perf_counter() - started) * 1000)
+        return timeline
+    if file_extension not in SUPPORTED_EXTENSIONS:
+        raise ValueError(f"Unsupported file format: {file_extension}")
+
+    started = time.perf_counter()
+    detected_encoding = None
+    data = None
+    try:
+        data = read_file(file_name)
+        timeline = load_cached_timeline(file_name, data) if use_cache else None
+        if timeline is None:
+            data_size = max(len(data), 1)
+            detected_encoding = detect_file_encoding(file_name, data)
+            detection_time = time.perf_counter() - started
+            logging.info("Detected encoding: %s", detected_encoding)
+            report(10)
+
+            # The built-in streaming parser handles well-formed files; the format libraries are
+            # only used when it finds nothing, so their error reporting is kept for broken files
+            cues = []
+            next_partial = FIRST_PARTIAL_SIZE
+            lines = iter_lines(data, detected_encoding,
+                               progress=lambda bytes_read: report(10 + 85 * bytes_read // data_size))
+            for cue in CUE_PARSERS[file_extension](lines):
+                cues.append(cue)
+                if on_partial and len(cues) >= next_partial:
+                    on_partial(CueTimeline(cues))
+                    next_partial *= 4
+            if cues:
+                timeline = CueTimeline(cues)
+            else:
+                logging.info("Streaming parser found no cues, falling back to format libraries")
+                content = codecs.decode(data, detected_encoding)
+                # Compile once into integer-millisecond cues so playback never re-parses timestamps
+                timeline = build_timeline(parse_with_libraries(content, file_extension))
+            if use_cache:
+                try:
+                    store_timeline(file_name, data, timeline)
+                except OSError as e:
+                    logging.warning("Could not write cue cache entry: %s", e)
+        else:
+            detection_time = None
+            logging.info("Loaded subtitles from the cue cache")
+        report(100)
+    except LoadCancelled:
+        logging.info("Loading cancelled: %s", file_name)
+        raise
+    except Exception as e:
+        logging.error("Error loading subtitles: %s", e)
+        # Log more details about the file
+        if data is not None:
+            first_lines = bytes(data[:4096]).decode(detected_encoding or 'utf-8', errors='replace')
+            first_lines = '\n'.join(first_lines.splitlines()[:10])  # First 10 lines
+            logging.error("First 10 lines of the file:\n%s", first_lines)
+        raise
+    finally:
+        if isinstance(data, mmap.mmap):
+            data.close()
+
+    elapsed = time.perf_counter() - started
+    if detection_time is None:
+        logging.info("Loaded %s subtitles in %.1f ms", len(timeline), elapsed * 1000)
+    else:
+        logging.info("Loaded %s subtitles in %.1f ms (encoding detection %.1f ms)",
+                     len(timeline), elapsed * 1000, detection_time * 1000)
+    logging.debug("First subtitle: %s", timeline[0] if len(timeline) else 'None')
+    return timeline
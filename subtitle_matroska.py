@@ -0,0 +1,465 @@
+import logging
+import os
+import zlib
+from subtitle_cues import Cue, CueTimeline
+
+# Element IDs as they appear in the file, length marker included
+EBML = 0x1A45DFA3
+DOC_TYPE = 0x4282
+SEGMENT = 0x18538067
+SEEK_HEAD = 0x114D9B74
+SEEK = 0x4DBB
+SEEK_ID = 0x53AB
+SEEK_POSITION = 0x53AC
+INFO = 0x1549A966
+TIMESTAMP_SCALE = 0x2AD7B1
+TRACKS = 0x1654AE6B
+TRACK_ENTRY = 0xAE
+TRACK_NUMBER = 0xD7
+TRACK_TYPE = 0x83
+CODEC_ID = 0x86
+CODEC_PRIVATE = 0x63A2
+NAME = 0x536E
+LANGUAGE = 0x22B59C
+LANGUAGE_IETF = 0x22B59D
+FLAG_DEFAULT = 0x88
+FLAG_FORCED = 0x55AA
+CONTENT_ENCODINGS = 0x6D80
+CONTENT_ENCODING = 0x6240
+CONTENT_COMPRESSION = 0x5034
+CONTENT_COMP_ALGO = 0x4254
+CONTENT_COMP_SETTINGS = 0x4255
+CUES = 0x1C53BB6B
+CUE_POINT = 0xBB
+CUE_TRACK_POSITIONS = 0xB7
+CUE_TRACK = 0xF7
+CUE_CLUSTER_POSITION = 0xF1
+CUE_RELATIVE_POSITION = 0xF0
+CLUSTER = 0x1F43B675
+CLUSTER_TIMESTAMP = 0xE7
+SIMPLE_BLOCK = 0xA3
+BLOCK_GROUP = 0xA0
+BLOCK = 0xA1
+BLOCK_DURATION = 0x9B
+
+SUBTITLE_TRACK = 0x11
+ZLIB_COMPRESSION = 0
+HEADER_STRIPPING = 3
+# Codec ID -> how a block's payload becomes cue text. Bitmap formats (VobSub, PGS) are listed but not read.
+TEXT_CODECS = {
+    'S_TEXT/UTF8': 'text',
+    'S_TEXT/ASCII': 'text',
+    'S_TEXT/WEBVTT': 'text',
+    'D_WEBVTT/SUBTITLES': 'text',
+    'S_TEXT/ASS': 'ass',
+    'S_TEXT/SSA': 'ass',
+    'S_ASS': 'ass',
+    'S_SSA': 'ass',
+}
+HEADER_SIZE = 12  # Enough for any element ID (4 bytes) and size (8 bytes)
+PEEK_SIZE = HEADER_SIZE + 8  # A block header too: track number, timestamp and flags
+MISSING_DURATION = 2000  # ms shown for a cue whose block has no duration and no next cue
+
+
+class MatroskaError(ValueError):
+    pass
+
+
+def read_vint(data, position):
+    # Returns (value with the length marker still set, length)
+    first = data[position]
+    if not first:
+        raise MatroskaError(f"Invalid EBML number at {position}")
+    length = 9 - first.bit_length()
+    return int.from_bytes(data[position:position + length], 'big'), length
+
+
+def read_size(data, position):
+    value, length = read_vint(data, position)
+    value &= (1 << (7 * length)) - 1
+    return (None if value == (1 << (7 * length)) - 1 else value), length  # None: unknown size
+
+
+def read_uint(data):
+    return int.from_bytes(data, 'big')
+
+
+def block_track(data, position):
+    number, length = read_vint(data, position)
+    return number & ((1 << (7 * length)) - 1)
+
+
+def iter_children(data):
+    # (id, payload) for every element in an in-memory master element body
+    position = 0
+    while position < len(data):
+        element_id, id_length = read_vint(data, position)
+        size, size_length = read_size(data, position + id_length)
+        start = position + id_length + size_length
+        if size is None:
+            size = len(data) - start
+        yield element_id, data[start:start + size]
+        position = start + size
+
+
+class MatroskaTrack:
+    def __init__(self, entry):
+        self.number = 0
+        self.type = 0
+        self.codec = ''
+        self.name = ''
+        self.language = 'eng'  # The Matroska default
+        self.default = True
+        self.forced = False
+        self.codec_private = b''
+        self.compression = None  # (algorithm, settings)
+        for element_id, value in iter_children(entry):
+            if element_id == TRACK_NUMBER:
+                self.number = read_uint(value)
+            elif element_id == TRACK_TYPE:
+                self.type = read_uint(value)
+            elif element_id == CODEC_ID:
+                self.codec = value.decode('ascii', 'replace').rstrip('\0')
+            elif element_id == NAME:
+                self.name = value.decode('utf-8', 'replace').rstrip('\0')
+            elif element_id == LANGUAGE and self.language == 'eng':
+                self.language = value.decode('ascii', 'replace').rstrip('\0')
+            elif element_id == LANGUAGE_IETF:
+                self.language = value.decode('ascii', 'replace').rstrip('\0')
+            elif element_id == FLAG_DEFAULT:
+                self.default = bool(read_uint(value))
+            elif element_id == FLAG_FORCED:
+                self.forced = bool(read_uint(value))
+            elif element_id == CODEC_PRIVATE:
+                self.codec_private = value
+            elif element_id == CONTENT_ENCODINGS:
+                self.read_encodings(value)
+
+    def read_encodings(self, data):
+        for _, encoding in iter_children(data):
+            for element_id, compression in iter_children(encoding):
+                if element_id != CONTENT_COMPRESSION:
+                    continue
+                algorithm, settings = ZLIB_COMPRESSION, b''
+                for setting_id, value in iter_children(compression):
+                    if setting_id == CONTENT_COMP_ALGO:
+                        algorithm = read_uint(value)
+                    elif setting_id == CONTENT_COMP_SETTINGS:
+                        settings = value
+                self.compression = (algorithm, settings)
+
+    @property
+    def is_subtitle(self):
+        return self.type == SUBTITLE_TRACK
+
+    @property
+    def is_text(self):
+        return self.is_subtitle and self.codec in TEXT_CODECS
+
+    def decode(self, payload):
+        if self.compression:
+            algorithm, settings = self.compression
+            if algorithm == ZLIB_COMPRESSION:
+                payload = zlib.decompress(payload)
+            elif algorithm == HEADER_STRIPPING:
+                payload = settings + payload
+            else:
+                raise MatroskaError(f"Unsupported compression {algorithm} on track {self.number}")
+        text = payload.decode('utf-8', 'replace').rstrip('\0').replace('\r\n', '\n').strip('\n')
+        if TEXT_CODECS[self.codec] == 'ass':
+            # ReadOrder, Layer, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+            text = text.split(',', 8)[-1]
+        return text
+
+    def label(self):
+        flags = [flag for flag, on in (('default', self.default), ('forced', self.forced)) if on]
+        name = f" \"{self.name}\"" if self.name else ''
+        unsupported = '' if self.is_text else ' (not supported)'
+        flags = f" [{', '.join(flags)}]" if flags else ''
+        return f"Track {self.number}: {self.language} {self.codec}{name}{flags}{unsupported}"
+
+
+class MatroskaFile:
+    # Reads only what it needs: the headers, SeekHead, Info, Tracks and Cues, then the
+    # subtitle blocks themselves. The Cues index points straight at each subtitle block, so
+    # the clusters of video and audio around them are never read. Files without index
+    # entries for the track are walked cluster by cluster, reading element headers only.
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self.file = open(file_name, 'rb', buffering=0)
+        self.file_size = os.fstat(self.file.fileno()).st_size
+        self.bytes_read = 0
+        self.reads = 0
+        self.timestamp_scale = 1000000  # ns per timestamp unit
+        self.tracks = []
+        self.positions = {}  # Level 1 element ID -> file offset
+        self.cue_points = None  # (track number, cluster offset, relative offset or None), read on first use
+        try:
+            self.read_structure()
+        except Exception:
+            self.close()
+            raise
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def read_at(self, offset, size):
+        self.file.seek(offset)
+        data = self.file.read(size)
+        self.bytes_read += len(data)
+        self.reads += 1
+        return data
+
+    def read_header(self, offset, peek=HEADER_SIZE):
+        # (id, size, data offset, bytes read from offset) of the element at offset
+        data = self.read_at(offset, peek)
+        if len(data) < 2:
+            return None
+        element_id, id_length = read_vint(data, 0)
+        size, size_length = read_size(data, id_length)
+        return element_id, size, offset + id_length + size_length, data
+
+    def read_element(self, offset):
+        element_id, size, data_offset, _ = self.read_header(offset)
+        if size is None:
+            size = self.segment_end - data_offset
+        return element_id, self.read_at(data_offset, size)
+
+    def read_structure(self):
+        header = self.read_header(0)
+        if not header or header[0] != EBML:
+            raise MatroskaError(f"Not a Matroska file: {self.file_name}")
+        _, size, data_offset, _ = header
+        doc_type = dict(iter_children(self.read_at(data_offset, size))).get(DOC_TYPE, b'')
+        if doc_type not in (b'matroska', b'webm'):
+            raise MatroskaError(f"Unsupported EBML document type: {doc_type!r}")
+
+        header = self.read_header(data_offset + size)
+        if not header or header[0] != SEGMENT:
+            raise MatroskaError(f"No Matroska segment in {self.file_name}")
+        _, size, self.segment_start, _ = header
+        self.segment_end = self.file_size if size is None else min(self.segment_start + size, self.file_size)
+
+        # The SeekHead at the start of the segment says where everything else is
+        first = self.read_header(self.segment_start)
+        if first and first[0] == SEEK_HEAD:
+            self.read_seek_head(self.segment_start)
+        if TRACKS not in self.positions or CUES not in self.positions:
+            self.scan_level1()
+        if TRACKS not in self.positions:
+            raise MatroskaError(f"No tracks in {self.file_name}")
+
+        if INFO in self.positions:
+            for element_id, value in iter_children(self.read_element(self.positions[INFO])[1]):
+                if element_id == TIMESTAMP_SCALE:
+                    self.timestamp_scale = read_uint(value)
+        self.tracks = [MatroskaTrack(entry) for element_id, entry in
+                       iter_children(self.read_element(self.positions[TRACKS])[1]) if element_id == TRACK_ENTRY]
+
+    def read_seek_head(self, offset):
+        for element_id, seek in iter_children(self.read_element(offset)[1]):
+            if element_id != SEEK:
+                continue
+            values = dict(iter_children(seek))
+            if SEEK_ID in values and SEEK_POSITION in values:
+                target = read_uint(values[SEEK_ID])
+                position = self.segment_start + read_uint(values[SEEK_POSITION])
+                if target == SEEK_HEAD and position != offset and SEEK_HEAD not in self.positions:
+                    self.positions[SEEK_HEAD] = position  # A second SeekHead, usually at the end
+                    self.read_seek_head(position)
+                else:
+                    self.positions.setdefault(target, position)
+
+    def scan_level1(self):
+        # Without a usable SeekHead: hop from one top-level element to the next by their sizes
+        offset = self.segment_start
+        while offset < self.segment_end:
+            header = self.read_header(offset)
+            if not header:
+                break
+            element_id, size, data_offset, _ = header
+            self.positions.setdefault(element_id, offset)
+            if size is None or (TRACKS in self.positions and CUES in self.positions):
+                break
+            offset = data_offset + size
+
+    def read_cues(self):
+        # Listing tracks never needs the index, so it is only read for extraction
+        self.cue_points = []
+        if CUES not in self.positions:
+            return
+        for element_id, point in iter_children(self.read_element(self.positions[CUES])[1]):
+            if element_id != CUE_POINT:
+                continue
+            for child_id, positions in iter_children(point):
+                if child_id != CUE_TRACK_POSITIONS:
+                    continue
+                values = dict(iter_children(positions))
+                if CUE_TRACK in values and CUE_CLUSTER_POSITION in values:
+                    relative = values.get(CUE_RELATIVE_POSITION)
+                    self.cue_points.append((read_uint(values[CUE_TRACK]),
+                                            self.segment_start + read_uint(values[CUE_CLUSTER_POSITION]),
+                                            None if relative is None else read_uint(relative)))
+
+    def subtitle_tracks(self):
+        return [track for track in self.tracks if track.is_subtitle]
+
+    def track(self, number=None):
+        # The given track, or the default (then the first) text subtitle track
+        text_tracks = [track for track in self.tracks if track.is_text]
+        if number is None:
+            if not text_tracks:
+                raise MatroskaError(f"No text subtitle tracks in {self.file_name}")
+            return next((track for track in text_tracks if track.default), text_tracks[0])
+        for track in self.tracks:
+            if track.number == number:
+                if not track.is_text:
+                    raise MatroskaError(f"Track {number} is not a text subtitle track ({track.codec})")
+                return track
+        raise MatroskaError(f"No track {number} in {self.file_name}")
+
+    def cluster_timestamp(self, cluster_offset):
+        # The Timestamp is the first child of a cluster in practice; read just far enough to find it
+        _, size, data_offset, _ = self.read_header(cluster_offset)
+        end = self.segment_end if size is None else data_offset + size
+        offset = data_offset
+        while offset < end:
+            element_id, child_size, child_data, data = self.read_header(offset, PEEK_SIZE)
+            if element_id == CLUSTER_TIMESTAMP:
+                value = data[child_data - offset:child_data - offset + child_size]
+                if len(value) < child_size:
+                    value = self.read_at(child_data, child_size)
+                return read_uint(value), data_offset, end
+            if child_size is None:
+                break
+            offset = child_data + child_size
+        raise MatroskaError(f"Cluster at {cluster_offset} has no timestamp")
+
+    def read_block(self, offset, track_number, header=None):
+        # Decodes the SimpleBlock or BlockGroup at offset into (timestamp, duration, payload), or
+        # None when it belongs to another track. Other tracks' blocks are rejected on the bytes
+        # read with their header, so their payload is never read.
+        element_id, size, data_offset, data = header or self.read_header(offset, PEEK_SIZE)
+        if element_id not in (SIMPLE_BLOCK, BLOCK_GROUP) or size is None:
+            return None
+        position = data_offset - offset
+        if element_id == BLOCK_GROUP:
+            # The Block comes first in a BlockGroup in practice
+            inner_id, id_length = read_vint(data, position)
+            position = position + id_length + read_size(data, position + id_length)[1] if inner_id == BLOCK else None
+        if position is not None and position < len(data) and block_track(data, position) != track_number:
+            return None
+
+        body = self.read_at(data_offset, size)
+        duration = None
+        if element_id == BLOCK_GROUP:
+            block = None
+            for child_id, value in iter_children(body):
+                if child_id == BLOCK:
+                    block = value
+                elif child_id == BLOCK_DURATION:
+                    duration = read_uint(value)
+            if block is None:
+                return None
+            body = block
+        if block_track(body, 0) != track_number:
+            return None
+        length = read_vint(body, 0)[1]
+        timestamp = int.from_bytes(body[length:length + 2], 'big', signed=True)
+        if body[length + 2] & 0x06:
+            logging.warning("Skipping a laced subtitle block at %s", offset)
+            return None
+        return timestamp, duration, body[length + 3:]
+
+    def iter_cluster_blocks(self, cluster_offset, track_number):
+        # Every block of the track in one cluster, reading only the headers of the others
+        cluster_time, data_offset, end = self.cluster_timestamp(cluster_offset)
+        offset = data_offset
+        while offset < end:
+            header = self.read_header(offset, PEEK_SIZE)
+            if not header:
+                break
+            element_id, size, child_data, _ = header
+            if element_id in (CLUSTER, CUES) or size is None:
+                break  # A cluster of unknown size ends where the next top-level element starts
+            if element_id in (SIMPLE_BLOCK, BLOCK_GROUP):
+                block = self.read_block(offset, track_number, header)
+                if block:
+                    yield cluster_time, block
+            offset = child_data + size
+
+    def iter_clusters(self):
+        offset = self.positions.get(CLUSTER, self.segment_start)
+        while offset < self.segment_end:
+            header = self.read_header(offset)
+            if not header:
+                break
+            element_id, size, data_offset, _ = header
+            if element_id == CLUSTER:
+                yield offset
+            if size is None:
+                break
+            offset = data_offset + size
+
+    def iter_blocks(self, track_number, progress=None):
+        # (cluster timestamp, (block timestamp, duration, payload)) in file order
+        if self.cue_points is None:
+            self.read_cues()
+        points = sorted({(cluster, relative) for number, cluster, relative in self.cue_points
+                         if number == track_number})
+        if points and all(relative is not None for _, relative in points):
+            clusters = {}
+            for index, (cluster, relative) in enumerate(points):
+                if cluster not in clusters:
+                    clusters[cluster] = self.cluster_timestamp(cluster)
+                cluster_time, data_offset, _ = clusters[cluster]
+                block = self.read_block(data_offset + relative, track_number)
+                if block:
+                    yield cluster_time, block
+                if progress and index % 256 == 0:
+                    progress(index * 100 // len(points))
+            return
+        if points:
+            clusters = sorted({cluster for cluster, _ in points})
+        else:
+            logging.info("No index entries for track %s, walking all clusters", track_number)
+            clusters = self.iter_clusters()
+        for cluster in clusters:
+            yield from self.iter_cluster_blocks(cluster, track_number)
+            if progress:
+                progress(min((cluster - self.segment_start) * 100 // max(self.segment_end - self.segment_start, 1), 99))
+
+    def read_cues_of(self, track, progress=None):
+        scale = self.timestamp_scale / 1000000  # Timestamp units to milliseconds
+        blocks = []
+        for cluster_time, (timestamp, duration, payload) in self.iter_blocks(track.number, progress):
+            start = round((cluster_time + timestamp) * scale)
+            end = None if duration is None else start + round(duration * scale)
+            blocks.append((start, end, track.decode(payload)))
+        blocks.sort(key=lambda block: block[0])
+        cues = []
+        for index, (start, end, text) in enumerate(blocks):
+            if end is None:
+                end = blocks[index + 1][0] if index + 1 < len(blocks) else start + MISSING_DURATION
+            cues.append(Cue(start, end, text))
+        return cues
+
+
+def list_subtitle_tracks(file_name):
+    with MatroskaFile(file_name) as mkv:
+        return mkv.subtitle_tracks()
+
+
+def read_matroska_timeline(file_name, track=None, progress=None):
+    with MatroskaFile(file_name) as mkv:
+        selected = mkv.track(track)
+        timeline = CueTimeline(mkv.read_cues_of(selected, progress))
+        logging.info("Read %s cues from %s with %s reads, %.1f KiB of %.1f MiB",
+                     len(timeline), selected.label(), mkv.reads, mkv.bytes_read / 1024, mkv.file_size / 1048576)
+        return timeline
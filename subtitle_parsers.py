@@ -0,0 +1,126 @@
+import codecs
+from subtitle_cues import Cue, time_to_milliseconds
+
+CHUNK_SIZE = 256 * 1024
+DEFAULT_ASS_EVENT_FORMAT = ['layer', 'start', 'end', 'style', 'name', 'marginl', 'marginr', 'marginv', 'effect', 'text']
+
+
+def iter_chunks(data):
+    # Slicing copies each chunk, so no views into a memory-mapped buffer outlive the parse
+    for offset in range(0, len(data), CHUNK_SIZE):
+        yield data[offset:offset + CHUNK_SIZE]
+
+
+def iter_lines(data, encoding, progress=None):
+    # Decodes a bytes-like buffer (usually a memory-mapped file) incrementally and yields
+    # lines without their line endings. progress(bytes_read) is called after every chunk.
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ''
+    bytes_read = 0
+    for chunk in iter_chunks(data):
+        bytes_read += len(chunk)
+        lines = (pending + decoder.decode(chunk)).split('\n')
+        pending = lines.pop()
+        for line in lines:
+            yield line.rstrip('\r')
+        if progress:
+            progress(bytes_read)
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending.rstrip('\r')
+
+
+def parse_timing(line):
+    start, _, rest = line.partition('-->')
+    rest = rest.split()
+    if not rest:
+        return None
+    try:
+        return time_to_milliseconds(start), time_to_milliseconds(rest[0])
+    except ValueError:
+        return None
+
+
+def iter_srt_cues(lines):
+    timing = None
+    text_lines = []
+    for line in lines:
+        if not line.strip():
+            if timing:
+                yield Cue(timing[0], timing[1], '\n'.join(text_lines))
+            timing = None
+            text_lines = []
+        elif timing is None:
+            # The counter line is skipped, the timing line opens the cue
+            if '-->' in line:
+                timing = parse_timing(line)
+        else:
+            text_lines.append(line)
+    if timing:
+        yield Cue(timing[0], timing[1], '\n'.join(text_lines))
+
+
+def iter_vtt_cues(lines):
+    timing = None
+    text_lines = []
+    skipping = False
+    for line in lines:
+        if not line.strip():
+            if timing:
+                yield Cue(timing[0], timing[1], '\n'.join(text_lines))
+            timing = None
+            text_lines = []
+            skipping = False
+        elif skipping:
+            continue
+        elif timing is None:
+            # Cue identifiers are skipped; header, NOTE, STYLE and REGION blocks are ignored
+            if '-->' in line:
+                timing = parse_timing(line)
+            elif line.lstrip('\ufeff').startswith(('WEBVTT', 'NOTE', 'STYLE', 'REGION')):
+                skipping = True
+        else:
+            text_lines.append(line)
+    if timing:
+        yield Cue(timing[0], timing[1], '\n'.join(text_lines))
+
+
+def iter_ass_cues(lines):
+    in_events = False
+    fields = DEFAULT_ASS_EVENT_FORMAT
+    start_index, end_index = 1, 2
+    for line in lines:
+        line = line.strip()
+        if line.startswith('['):
+            in_events = line.lower() == '[events]'
+            continue
+        if not in_events:
+            continue
+        key, separator, value = line.partition(':')
+        if not separator:
+            continue
+        key = key.strip().lower()
+        if key == 'format':
+            fields = [field.strip().lower() for field in value.split(',')]
+            if 'start' not in fields or 'end' not in fields:
+                fields = DEFAULT_ASS_EVENT_FORMAT
+            start_index, end_index = fields.index('start'), fields.index('end')
+        elif key == 'dialogue':
+            # Text is always the last field and may itself contain commas
+            parts = value.lstrip().split(',', len(fields) - 1)
+            if len(parts) < len(fields):
+                continue
+            try:
+                start = time_to_milliseconds(parts[start_index])
+                end = time_to_milliseconds(parts[end_index])
+            except ValueError:
+                continue
+            yield Cue(start, end, parts[-1])
+
+
+CUE_PARSERS = {
+    '.srt': iter_srt_cues,
+    '.vtt': iter_vtt_cues,
+    '.ass': iter_ass_cues,
+    '.ssa': iter_ass_cues,
+}
@@ -1,34 +1,127 @@
 import sys
 import logging
+import time
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QLabel, QWidget, QFileDialog,
                              QPushButton, QGridLayout, QVBoxLayout, QColorDialog, QFontDialog,
-                             QDialog, QCheckBox, QListWidget, QListWidgetItem, QSplitter,
-                             QSpinBox, QHBoxLayout)
-from PyQt6.QtCore import Qt, QTimer, QEvent, QSettings, QElapsedTimer
-from PyQt6.QtGui import QColor, QFont, QDragEnterEvent, QDropEvent
-import pysrt
+                             QDialog, QCheckBox, QListView, QSplitter,
+                             QSpinBox, QHBoxLayout, QAbstractItemView, QProgressBar, QComboBox, QLineEdit,
+                             QInputDialog, QListWidget, QMessageBox)
+from PyQt6.QtCore import (Qt, QTimer, QEvent, QSettings, QAbstractListModel, QModelIndex,
+                          QObject, QRunnable, QThreadPool, pyqtSignal, QFileSystemWatcher)
+from collections import deque
+from PyQt6.QtGui import QColor, QFont, QFontMetrics, QDragEnterEvent, QDropEvent
 import os
-import chardet
-import ass
-import io
-import webvtt
-import traceback
-import re
+from subtitle_canvas import SubtitleCanvas
+from subtitle_cues import CueCursor, CueTimeline, format_timestamp
+from subtitle_engine import SubtitleEngine
+from subtitle_search import SearchIndex
+from subtitle_stats import Metric, PlaybackStats, WakeupCounter
+from subtitle_sync import SyncController, monotonic_ms, open_sync_source
+from subtitle_stream import open_cue_stream
+from subtitle_watch import WatchedSubtitleFile
+from subtitle_text import render_plain_text, render_rich_text
+from subtitle_loader import MATROSKA_EXTENSIONS, SUPPORTED_EXTENSIONS, LoadCancelled, load_timeline
+from subtitle_matroska import MatroskaError, list_subtitle_tracks
+from subtitle_encoding import file_cache_key
+from subtitle_writers import REWRITE_EXTENSIONS, WRITERS, write_cues, write_retimed_source
 
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+STATS_EXPORT_NAME = 'subtitle_viewer_stats'  # .json and .csv are written at the end of the session
+STATS_REFRESH_INTERVAL = 500
+TRACK_COLORS = ['#ffd700', '#87ceeb', '#98fb98', '#ffb6c1']
+TRACK_POSITIONS = [5, 25, 45, 65]  # Percent of the display height, from the top
+PREFETCH_CUES = 3  # Upcoming cue texts the fullscreen display lays out ahead of time
+PREFETCH_DELAY = 50  # ms after a cue change, so the prefetch never delays painting the cue just shown
+WATCH_DELAY = 100  # ms to wait after a change, editors often write a file in several steps
+TIMING_HIGHLIGHT_COLOR = '#ffd0c8'  # Background of list rows with timing problems
+LIVE_WINDOW = 500  # Past cues kept in the timeline and the list while showing live input
+LIVE_TRIM_SLACK = 4  # The live timeline grows by up to 1/4 of the window before it is trimmed back
+PLAYLIST_PREFETCH_AHEAD = 1  # Playlist entries after the current one kept parsed and indexed in memory
+PREFETCH_RENDER_CUES = 50  # Cues of a prefetched file rendered ahead so its first rows and cues are cached
+PLAYBACK_RATES = [0.25, 0.5, 0.75, 1.0, 1.25, 1.5, 2.0, 3.0, 4.0]
+OPEN_FILE_FILTER = "Subtitle Files (*.srt *.vtt *.ass *.ssa *.mkv *.mks *.webm)"
+STATS_STYLE = "color: #0f0; background-color: rgba(0, 0, 0, 160); font-family: monospace; font-size: 11px;"
+
+
+def configure_logging(level=logging.DEBUG, filename=None):
+    # Called once by the entry point; importing this module leaves logging untouched
+    if filename:
+        logging.basicConfig(level=level, format=LOG_FORMAT, filename=filename, filemode='w')
+    else:
+        logging.basicConfig(level=level, format=LOG_FORMAT)
+
+class TrackLabel(QLabel):
+    # Shows the active cues of one extra subtitle track
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setAlignment(Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignTop)
+        self.setTextFormat(Qt.TextFormat.RichText)
+        self.setWordWrap(True)
+
+    def show_cues(self, cues):
+        self.setText('<br>'.join(cue.display_text for cue in cues))
+
+    def set_style(self, color, font):
+        self.setStyleSheet(f"""
+            color: {color.name()};
+            font-family: {font.family()};
+            font-size: {font.pointSize()}px;
+            background: transparent;
+        """)
+
+class SubtitleTrackControls(QWidget):
+    changed = pyqtSignal(object)  # The track's color or position changed
+    removed = pyqtSignal(object)
+
+    def __init__(self, file_name, track, color, position, parent=None):
+        super().__init__(parent)
+        self.track = track
+        self.color = color
+        self.position = position
+        self.label = TrackLabel()  # Shown in the main window
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(QLabel(os.path.basename(file_name)), 1)
+        color_button = QPushButton('Color')
+        color_button.clicked.connect(self.choose_color)
+        layout.addWidget(color_button)
+        position_spinbox = QSpinBox()
+        position_spinbox.setRange(0, 100)
+        position_spinbox.setSuffix('%')
+        position_spinbox.setToolTip('Vertical position, from the top')
+        position_spinbox.setValue(position)
+        position_spinbox.valueChanged.connect(self.set_position)
+        layout.addWidget(position_spinbox)
+        remove_button = QPushButton('Remove')
+        remove_button.clicked.connect(lambda: self.removed.emit(self))
+        layout.addWidget(remove_button)
+
+    def choose_color(self):
+        color = QColorDialog.getColor(self.color, self, "Choose Track Color")
+        if color.isValid():
+            self.color = color
+            self.changed.emit(self)
+
+    def set_position(self, position):
+        self.position = position
+        self.changed.emit(self)
 
 class SubtitleDisplay(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent, Qt.WindowType.FramelessWindowHint)
-        self.setStyleSheet("background-color: black;")
         self.layout = QVBoxLayout(self)
-        self.subtitle_label = QLabel(self)
-        self.subtitle_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.layout.addWidget(self.subtitle_label)
-        self.layout.setAlignment(Qt.AlignmentFlag.AlignBottom)
-        self.layout.setContentsMargins(0, 0, 0, 50)  # Add bottom margin
+        self.layout.setContentsMargins(0, 0, 0, 0)
+        self.canvas = SubtitleCanvas(self, margin=50, background=QColor('black'))  # 50 px bottom margin
+        self.layout.addWidget(self.canvas)
         self.installEventFilter(self)
         self.subtitle_color = QColor('white')  # Default subtitle color
+        # Floats over the top left corner, outside the layout, so it never moves the subtitles
+        self.stats_label = QLabel(self)
+        self.stats_label.setStyleSheet(STATS_STYLE)
+        self.stats_label.move(10, 10)
+        self.stats_label.hide()
+        self.track_canvases = {}  # SubtitleTrackControls -> SubtitleCanvas placed at the track's position
+        self.subtitle_font = QFont()
 
     def eventFilter(self, obj, event):
         if event.type() == QEvent.Type.KeyPress and event.key() == Qt.Key.Key_Escape:
@@ -37,44 +130,337 @@ class SubtitleDisplay(QDialog):
         return super().eventFilter(obj, event)
 
     def set_text(self, text):
-        self.subtitle_label.setText(text)
+        self.canvas.show_text(text)
+
+    def show_cues(self, cues):
+        self.set_text('<br>'.join(cue.display_text for cue in cues))
+
+    def prepare(self, texts):
+        self.canvas.prepare(texts)
+
+    def add_track(self, controls):
+        canvas = SubtitleCanvas(self, align_top=True)
+        self.track_canvases[controls] = canvas
+        controls.track.subscribe(canvas.show_cues)
+        canvas.show_cues(controls.track.cursor.active_cues())
+        canvas.set_font(self.subtitle_font)
+        self.update_track(controls)
+        canvas.show()
+
+    def remove_track(self, controls):
+        canvas = self.track_canvases.pop(controls)
+        controls.track.unsubscribe(canvas.show_cues)
+        canvas.deleteLater()
+
+    def update_track(self, controls):
+        canvas = self.track_canvases[controls]
+        canvas.set_color(controls.color)
+        height = QFontMetrics(self.subtitle_font).height() * 3  # Room for three lines of cue text
+        top = min(self.height() * controls.position // 100, max(self.height() - height, 0))
+        canvas.setGeometry(0, top, self.width(), height)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        for controls in self.track_canvases:
+            self.update_track(controls)
+
+    def set_stats_text(self, text):
+        if text is None:
+            self.stats_label.hide()
+            return
+        self.stats_label.setText(text)
+        self.stats_label.adjustSize()
+        self.stats_label.show()
+        self.stats_label.raise_()
 
     def set_font(self, font):
-        self.subtitle_label.setFont(font)
-        self.update_subtitle_style()
+        # Same size the style sheet gave the old label: the point size used as pixels
+        self.subtitle_font = QFont(font)
+        self.subtitle_font.setPixelSize(max(font.pointSize(), 1))
+        self.canvas.set_font(self.subtitle_font)
+        for controls, canvas in self.track_canvases.items():
+            canvas.set_font(self.subtitle_font)
+            self.update_track(controls)
 
     def set_background_color(self, color):
-        self.setStyleSheet(f"background-color: {color.name()};")
-        self.update_subtitle_style()
+        self.canvas.set_background(color)
 
     def set_subtitle_color(self, color):
         self.subtitle_color = color
-        self.update_subtitle_style()
+        self.canvas.set_color(color)
 
-    def update_subtitle_style(self):
-        current_font = self.subtitle_label.font()
-        self.subtitle_label.setStyleSheet(f"""
-            color: {self.subtitle_color.name()};
-            font-family: {current_font.family()};
-            font-size: {current_font.pointSize()}px;
-        """)
-        self.subtitle_label.setTextFormat(Qt.TextFormat.RichText)
+class SubtitleListModel(QAbstractListModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.timeline = None
+        self.timing_report = None  # subtitle_timing.TimingReport of the timeline, when checked
+
+    def set_timeline(self, timeline):
+        self.beginResetModel()
+        self.timeline = timeline
+        self.timing_report = None
+        self.endResetModel()
+
+    def set_timing_report(self, report):
+        self.timing_report = report
+        if self.rowCount():
+            self.dataChanged.emit(self.index(0), self.index(self.rowCount() - 1),
+                                  [Qt.ItemDataRole.BackgroundRole, Qt.ItemDataRole.ToolTipRole])
+
+    def append_timeline(self, timeline):
+        # The new timeline keeps every existing row at its index and only adds rows at the end
+        first = self.rowCount()
+        if len(timeline) > first:
+            self.beginInsertRows(QModelIndex(), first, len(timeline) - 1)
+            self.timeline = timeline
+            self.endInsertRows()
+        else:
+            self.timeline = timeline
+
+    def patch_rows(self, timeline, first, removed, added):
+        # timeline has the rows first..first + removed - 1 replaced by added new rows;
+        # every other row keeps its content, so selection and scrolling are preserved
+        common = min(removed, added)
+        if added > removed:
+            self.beginInsertRows(QModelIndex(), first + common, first + added - 1)
+            self.timeline = timeline
+            self.endInsertRows()
+        elif removed > added:
+            self.beginRemoveRows(QModelIndex(), first + common, first + removed - 1)
+            self.timeline = timeline
+            self.endRemoveRows()
+        else:
+            self.timeline = timeline
+        if common:
+            self.dataChanged.emit(self.index(first), self.index(first + common - 1))
+
+    def extend_timeline(self, cues):
+        # Live input: new cues appended to the shown timeline in place
+        first = self.rowCount()
+        self.beginInsertRows(QModelIndex(), first, first + len(cues) - 1)
+        self.timeline.extend(cues)
+        self.endInsertRows()
+
+    def slide_timeline(self, timeline, dropped):
+        # Live input: the oldest rows fall out of the window and new ones are appended
+        if dropped:
+            self.beginRemoveRows(QModelIndex(), 0, dropped - 1)
+            self.timeline = self.timeline[dropped:]  # The remaining cues, until the new ones are added
+            self.endRemoveRows()
+        self.append_timeline(timeline)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.timeline is None:
+            return 0
+        return len(self.timeline)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            # Rows are formatted only when the view paints them. The cue text is kept on one
+            # line so every row has the same height and the view never measures rows.
+            cue = self.timeline[index.row()]
+            text = render_plain_text(cue.text).replace('\n', ' ')
+            return f"{format_timestamp(cue.start)} - {format_timestamp(cue.end)}\n{text}"
+        report = self.timing_report
+        if report is None or role not in (Qt.ItemDataRole.BackgroundRole, Qt.ItemDataRole.ToolTipRole):
+            return None
+        row = index.row()
+        if row >= len(report.flags) or not report.flags[row]:
+            return None
+        return QColor(TIMING_HIGHLIGHT_COLOR) if role == Qt.ItemDataRole.BackgroundRole else report.describe(row)
+
+class SearchResultModel(SubtitleListModel):
+    # Rows are the matching cues of a search, formatted like the subtitle list
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.indices = []
+
+    def set_results(self, timeline, indices):
+        self.beginResetModel()
+        self.timeline = timeline
+        self.indices = indices
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.indices)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        return super().data(self.createIndex(self.indices[index.row()], 0), role)
+
+class SubtitleLoadSignals(QObject):
+    progress = pyqtSignal(int, int)  # generation, percent
+    partial = pyqtSignal(int, object)  # generation, CueTimeline of the cues parsed so far
+    finished = pyqtSignal(int, object)  # generation, CueTimeline
+    failed = pyqtSignal(int, str)  # generation, error message
+
+class SubtitleLoadTask(QRunnable):
+    def __init__(self, file_name, generation, track=None):
+        super().__init__()
+        self.file_name = file_name
+        self.generation = generation
+        self.track = track  # Subtitle track number in a Matroska file
+        self.cancelled = False
+        self.signals = SubtitleLoadSignals()
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        try:
+            timeline = load_timeline(self.file_name,
+                                     progress=lambda percent: self.signals.progress.emit(self.generation, percent),
+                                     is_cancelled=lambda: self.cancelled,
+                                     on_partial=lambda timeline: self.signals.partial.emit(self.generation, timeline),
+                                     track=self.track)
+        except LoadCancelled:
+            return
+        except Exception as e:
+            self.signals.failed.emit(self.generation, str(e))
+            return
+        self.signals.finished.emit(self.generation, timeline)
+
+class SyncSignals(QObject):
+    # Carries position reports from the sync worker thread to the GUI thread
+    sample = pyqtSignal(object)  # SyncSample
+    failed = pyqtSignal(str)
+
+class LiveSignals(QObject):
+    # Carries cues from the live input thread to the GUI thread
+    cues = pyqtSignal(object, float)  # list of Cues, monotonic ms when they were received
+    failed = pyqtSignal(str)
+
+class WatchSignals(QObject):
+    loaded = pyqtSignal(int)  # generation
+    reloaded = pyqtSignal(int, object)  # generation, WatchedSubtitleFile.reload() result
+    failed = pyqtSignal(int, str)  # generation, error message
+
+class WatchTask(QRunnable):
+    # Parses the watched file block by block the first time, then patches in only changed blocks
+    def __init__(self, watched_file, generation, reload):
+        super().__init__()
+        self.watched_file = watched_file
+        self.generation = generation
+        self.reload = reload
+        self.signals = WatchSignals()
+
+    def run(self):
+        try:
+            if self.reload:
+                self.signals.reloaded.emit(self.generation, self.watched_file.reload())
+            else:
+                self.watched_file.load()
+                self.signals.loaded.emit(self.generation)
+        except Exception as e:
+            self.signals.failed.emit(self.generation, str(e))
+
+class SearchIndexSignals(QObject):
+    finished = pyqtSignal(int, object)  # generation, SearchIndex
+
+class SearchIndexTask(QRunnable):
+    def __init__(self, timeline, generation):
+        super().__init__()
+        self.timeline = timeline
+        self.generation = generation
+        self.signals = SearchIndexSignals()
+
+    def run(self):
+        self.signals.finished.emit(self.generation, SearchIndex(self.timeline))
+
+class PrefetchedFile:
+    # Everything a playlist entry needs to start playing, built off the GUI thread
+    def __init__(self, file_name, timeline, search_index, timing_report):
+        self.file_name = file_name
+        self.timeline = timeline
+        self.search_index = search_index
+        self.timing_report = timing_report
+
+class PlaylistPrefetchSignals(QObject):
+    finished = pyqtSignal(int, int, object)  # playlist generation, entry index, PrefetchedFile
+    failed = pyqtSignal(int, int, str)  # playlist generation, entry index, error message
+
+class PlaylistPrefetchTask(QRunnable):
+    def __init__(self, file_name, generation, index, check_timing):
+        super().__init__()
+        self.file_name = file_name
+        self.generation = generation
+        self.index = index
+        self.check_timing = check_timing
+        self.signals = PlaylistPrefetchSignals()
+
+    def run(self):
+        try:
+            timeline = load_timeline(self.file_name)
+            search_index = SearchIndex(timeline)
+            timing_report = None
+            if self.check_timing:
+                from subtitle_timing import analyze_timing
+                timing_report = analyze_timing(timeline)
+            for index in range(min(len(timeline), PREFETCH_RENDER_CUES)):
+                text = timeline[index].text
+                render_rich_text(text)
+                render_plain_text(text)
+        except Exception as e:
+            self.signals.failed.emit(self.generation, self.index, str(e))
+            return
+        self.signals.finished.emit(self.generation, self.index,
+                                   PrefetchedFile(self.file_name, timeline, search_index, timing_report))
 
 class SubtitleReader(QMainWindow):
     def __init__(self):
         super().__init__()
         logging.info("Initializing SubtitleReader")
-        self.subtitles = None
-        self.current_subtitle_index = 0
+        self.engine = SubtitleEngine()
+        self.engine.subscribe(self.show_active_cues)
+        self.load_task = None
+        self.load_generation = 0
+        self.search_task = None
+        self.search_index = None
+        self.subtitle_tracks = []  # SubtitleTrackControls of the extra tracks
+        self.track_tasks = {}  # generation -> (SubtitleLoadTask, file name) of tracks being loaded
+        self.track_generation = 0
+        self.sync_source = None
+        self.sync_signals = None
+        self.sync_controller = SyncController(self.engine)
+        self.live_stream = None
+        self.live_signals = None
+        self.live_cues = None  # deque of the last live_window cues received
+        self.live_latency = Metric()  # Received to indexed, listed and (when due) on screen
+        self.playlist = []  # File names played back to back
+        self.playlist_index = -1
+        self.playlist_generation = 0
+        self.prefetched = {}  # Playlist index -> PrefetchedFile, at most PLAYLIST_PREFETCH_AHEAD entries
+        self.prefetch_tasks = {}  # Playlist index -> PlaylistPrefetchTask in flight
+        self.play_when_loaded = False
+        self.current_file = None
+        self.source_key = None  # file_cache_key of current_file when it was read
+        self.source_retime = None  # (scale, shift) applied since current_file was read, None if unchanged
+        self.watched_file = None  # WatchedSubtitleFile once its blocks are parsed
+        self.watch_task = None
+        self.watch_pending = False
+        self.file_watcher = QFileSystemWatcher(self)
+        self.file_watcher.fileChanged.connect(self.on_watched_file_changed)
+        self.watch_timer = QTimer(self)
+        self.watch_timer.setSingleShot(True)
+        self.watch_timer.timeout.connect(self.reload_watched_file)
+        self.shown_generation = 0
         self.subtitle_timer = QTimer(self)
+        self.subtitle_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.subtitle_timer.timeout.connect(self.record_wakeup)
         self.subtitle_timer.timeout.connect(self.update_subtitle)
-        self.elapsed_timer = QElapsedTimer()
-        self.last_update_time = 0
-        self.subtitle_playing = False
-        self.subtitle_position = 0
+        self.wakeups = WakeupCounter()
+        self.playback_stats = None
+        self.stats_timer = QTimer(self)
+        self.stats_timer.timeout.connect(self.refresh_stats_overlay)
         
         self.subtitle_display = None
         self.start_from_selected_line = False
+        self.paused_row = -1  # Selected row when playback was paused
         
         self.setAcceptDrops(True)
         
@@ -85,22 +471,40 @@ class SubtitleReader(QMainWindow):
         
         self.subtitle_color = QColor('white')  # Default subtitle color
         
-        self.current_subtitle_text = ""  # Add this line to store current subtitle text
-        
         self.initUI()
         
         logging.info("Finished initializing SubtitleReader")
 
+    @property
+    def subtitles(self):
+        return self.engine.timeline
+
     def load_settings(self):
         font_family = self.settings.value("font_family", "Arial")
         font_size = int(self.settings.value("font_size", 24))
         self.current_font = QFont(font_family, font_size)
         self.subtitle_color = QColor(self.settings.value("subtitle_color", QColor('white')))
+        self.event_driven_timing = self.settings.value("event_driven_timing", True, type=bool)
+        self.show_playback_stats = self.settings.value("playback_stats", False, type=bool)
+        self.sync_address = self.settings.value("sync_address", "mpv:/tmp/mpvsocket")
+        self.watch_file = self.settings.value("watch_file", False, type=bool)
+        self.timing_check = self.settings.value("timing_check", False, type=bool)
+        self.live_address = self.settings.value("live_address", "tcp:127.0.0.1:9100")
+        self.live_window = int(self.settings.value("live_window", LIVE_WINDOW))
+        self.retime_spec = self.settings.value("retime_spec", "shift 0")
 
     def save_settings(self):
         self.settings.setValue("font_family", self.current_font.family())
         self.settings.setValue("font_size", self.current_font.pointSize())
         self.settings.setValue("subtitle_color", self.subtitle_color.name())
+        self.settings.setValue("event_driven_timing", self.event_driven_timing)
+        self.settings.setValue("playback_stats", self.show_playback_stats)
+        self.settings.setValue("sync_address", self.sync_address)
+        self.settings.setValue("watch_file", self.watch_file)
+        self.settings.setValue("timing_check", self.timing_check)
+        self.settings.setValue("live_address", self.live_address)
+        self.settings.setValue("live_window", self.live_window)
+        self.settings.setValue("retime_spec", self.retime_spec)
 
     def initUI(self):
         logging.info("Starting initUI")
@@ -120,13 +524,58 @@ class SubtitleReader(QMainWindow):
 
         self.subtitle_label = QLabel('Open a subtitle file to start', self)
         self.subtitle_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.subtitle_label.setTextFormat(Qt.TextFormat.RichText)
         self.subtitle_label.setFont(self.current_font)
+        self.track_labels_layout = QVBoxLayout()
+        top_layout.addLayout(self.track_labels_layout)
         top_layout.addWidget(self.subtitle_label)
         logging.info("Subtitle label added")
 
-        self.subtitle_list = QListWidget()
-        self.subtitle_list.itemDoubleClicked.connect(self.start_from_selected_subtitle)
-        splitter.addWidget(self.subtitle_list)
+        self.stats_label = QLabel()
+        self.stats_label.setStyleSheet(STATS_STYLE)
+        self.stats_label.hide()
+        top_layout.addWidget(self.stats_label)
+
+        self.load_progress_bar = QProgressBar()
+        self.load_progress_bar.setRange(0, 100)
+        self.load_progress_bar.hide()
+        top_layout.addWidget(self.load_progress_bar)
+
+        self.playlist_view = QListWidget()
+        self.playlist_view.setMaximumHeight(100)
+        self.playlist_view.itemDoubleClicked.connect(
+            lambda item: self.play_playlist_entry(self.playlist_view.row(item)))
+        self.playlist_view.hide()
+        top_layout.addWidget(self.playlist_view)
+
+        search_widget = QWidget()
+        search_layout = QVBoxLayout(search_widget)
+        search_layout.setContentsMargins(0, 0, 0, 0)
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText('Search subtitles')
+        self.search_box.setClearButtonEnabled(True)
+        self.search_box.setEnabled(False)
+        self.search_box.textChanged.connect(self.search_subtitles)
+        self.search_box.returnPressed.connect(self.jump_to_first_search_result)
+        search_layout.addWidget(self.search_box)
+
+        self.search_model = SearchResultModel(self)
+        self.search_results = QListView()
+        self.search_results.setModel(self.search_model)
+        self.search_results.setUniformItemSizes(True)
+        self.search_results.activated.connect(self.jump_to_search_result)
+        self.search_results.clicked.connect(self.jump_to_search_result)
+        self.search_results.setMaximumHeight(160)
+        self.search_results.hide()
+        search_layout.addWidget(self.search_results)
+
+        self.subtitle_model = SubtitleListModel(self)
+        self.subtitle_list = QListView()
+        self.subtitle_list.setModel(self.subtitle_model)
+        self.subtitle_list.setUniformItemSizes(True)
+        self.subtitle_list.doubleClicked.connect(self.start_from_selected_subtitle)
+        search_layout.addWidget(self.subtitle_list)
+        splitter.addWidget(search_widget)
 
         controls_widget = QWidget()
         controls_layout = QGridLayout(controls_widget)
@@ -167,6 +616,67 @@ class SubtitleReader(QMainWindow):
         self.start_selected_line_checkbox.stateChanged.connect(self.toggle_start_from_selected_line)
         controls_layout.addWidget(self.start_selected_line_checkbox, 1, 3)
 
+        self.event_driven_timing_checkbox = QCheckBox('Event-driven timing')
+        self.event_driven_timing_checkbox.setChecked(self.event_driven_timing)
+        self.event_driven_timing_checkbox.stateChanged.connect(self.toggle_event_driven_timing)
+        controls_layout.addWidget(self.event_driven_timing_checkbox, 0, 3)
+
+        self.playback_stats_checkbox = QCheckBox('Playback stats')
+        self.playback_stats_checkbox.setChecked(self.show_playback_stats)
+        self.playback_stats_checkbox.stateChanged.connect(self.toggle_playback_stats)
+        controls_layout.addWidget(self.playback_stats_checkbox, 2, 3)
+
+        self.playback_rate_combo = QComboBox()
+        for rate in PLAYBACK_RATES:
+            self.playback_rate_combo.addItem(f"{rate:g}x", rate)
+        self.playback_rate_combo.setCurrentIndex(PLAYBACK_RATES.index(1.0))
+        self.playback_rate_combo.currentIndexChanged.connect(self.change_playback_rate)
+        controls_layout.addWidget(self.playback_rate_combo, 2, 0)
+
+        self.add_track_button = QPushButton('Add Track')
+        self.add_track_button.setEnabled(False)
+        self.add_track_button.clicked.connect(self.add_subtitle_track)
+        controls_layout.addWidget(self.add_track_button, 2, 1)
+
+        self.watch_file_checkbox = QCheckBox('Watch file for changes')
+        self.watch_file_checkbox.setChecked(self.watch_file)
+        self.watch_file_checkbox.stateChanged.connect(self.toggle_watch_file)
+        controls_layout.addWidget(self.watch_file_checkbox, 3, 3)
+
+        self.timing_check_checkbox = QCheckBox('Check timing')
+        self.timing_check_checkbox.setChecked(self.timing_check)
+        self.timing_check_checkbox.stateChanged.connect(self.toggle_timing_check)
+        controls_layout.addWidget(self.timing_check_checkbox, 3, 0)
+
+        self.retime_button = QPushButton('Retime...')
+        self.retime_button.setEnabled(False)
+        self.retime_button.clicked.connect(self.retime_subtitles)
+        controls_layout.addWidget(self.retime_button, 3, 1)
+
+        self.save_subtitles_button = QPushButton('Save As...')
+        self.save_subtitles_button.setEnabled(False)
+        self.save_subtitles_button.clicked.connect(self.save_subtitles)
+        controls_layout.addWidget(self.save_subtitles_button, 3, 2)
+
+        self.sync_button = QPushButton('Sync to Player')
+        self.sync_button.clicked.connect(self.toggle_player_sync)
+        controls_layout.addWidget(self.sync_button, 2, 2)
+
+        self.live_button = QPushButton('Live Input...')
+        self.live_button.clicked.connect(self.toggle_live_input)
+        controls_layout.addWidget(self.live_button, 4, 0)
+
+        self.live_window_spinbox = QSpinBox()
+        self.live_window_spinbox.setRange(10, 100000)
+        self.live_window_spinbox.setPrefix('Keep ')
+        self.live_window_spinbox.setSuffix(' live cues')
+        self.live_window_spinbox.setValue(self.live_window)
+        self.live_window_spinbox.valueChanged.connect(self.set_live_window)
+        controls_layout.addWidget(self.live_window_spinbox, 4, 1)
+
+        self.tracks_layout = QVBoxLayout()
+        main_layout.addLayout(self.tracks_layout)
+
         default_font_widget = QWidget()
         default_font_layout = QHBoxLayout(default_font_widget)
         main_layout.addWidget(default_font_widget)
@@ -184,6 +694,8 @@ class SubtitleReader(QMainWindow):
         self.setStyleSheet("background-color: lightgray;")
         logging.info("Style sheet set")
 
+        self.set_playback_stats(self.show_playback_stats)
+
         self.show()
         logging.info("Window shown")
 
@@ -196,127 +708,558 @@ class SubtitleReader(QMainWindow):
             self.subtitle_label.setFont(self.current_font)
             self.default_font_size_spinbox.setValue(self.current_font.pointSize())
             self.save_settings()
-            logging.info(f"Default font set to {font.family()}, {font.pointSize()}pt")
+            logging.info("Default font set to %s, %spt", font.family(), font.pointSize())
 
     def set_default_font_size(self, size):
         self.current_font.setPointSize(size)
         self.subtitle_label.setFont(self.current_font)
         self.save_settings()
-        logging.info(f"Default font size set to {size}pt")
+        logging.info("Default font size set to %spt", size)
 
     def open_subtitle_file(self):
         logging.info("Opening subtitle file")
-        file_name, _ = QFileDialog.getOpenFileName(self, "Open Subtitle File", "", "Subtitle Files (*.srt *.vtt *.ass *.ssa)")
-        if file_name:
-            self.load_subtitles(file_name)
+        file_names, _ = QFileDialog.getOpenFileNames(self, "Open Subtitle Files", "", OPEN_FILE_FILTER)
+        if file_names:
+            self.set_playlist(file_names)
+
+    def choose_matroska_track(self, file_name):
+        # Listing the tracks only reads the file's headers, so it is done right here
+        try:
+            tracks = [track for track in list_subtitle_tracks(file_name) if track.is_text]
+        except (OSError, MatroskaError) as e:
+            self.subtitle_label.setText(f"Error reading {os.path.basename(file_name)}: {str(e)}")
+            return None
+        if not tracks:
+            self.subtitle_label.setText(f"No text subtitle tracks in {os.path.basename(file_name)}")
+            return None
+        if len(tracks) == 1:
+            return tracks[0].number
+        labels = [track.label() for track in tracks]
+        default = next((index for index, track in enumerate(tracks) if track.default), 0)
+        label, ok = QInputDialog.getItem(self, "Choose Subtitle Track", os.path.basename(file_name),
+                                         labels, default, False)
+        return tracks[labels.index(label)].number if ok else None
 
-    def load_subtitles(self, file_name):
-        logging.info(f"Loading subtitles from file: {file_name}")
+    def load_subtitles(self, file_name, ask_track=True):
+        # ask_track=False reads a Matroska file's default text track without asking
+        logging.info("Loading subtitles from file: %s", file_name)
         _, file_extension = os.path.splitext(file_name)
-        if file_extension.lower() in ['.srt', '.vtt', '.ass', '.ssa']:
-            try:
-                with open(file_name, 'rb') as f:
-                    raw_data = f.read()
-                detected_encoding = chardet.detect(raw_data)['encoding']
-                logging.info(f"Detected encoding: {detected_encoding}")
-                
-                if file_extension.lower() == '.srt':
-                    self.subtitles = pysrt.open(file_name, encoding=detected_encoding)
-                elif file_extension.lower() in ['.ass', '.ssa']:
-                    try:
-                        with io.open(file_name, 'r', encoding=detected_encoding) as f:
-                            content = f.read()
-                        
-                        # Attempt to fix color format
-                        content = content.replace('PrimaryColour', 'PrimaryColour: &H')
-                        content = content.replace('SecondaryColour', 'SecondaryColour: &H')
-                        content = content.replace('TertiaryColour', 'TertiaryColour: &H')
-                        content = content.replace('BackColour', 'BackColour: &H')
-                        
-                        parsed = ass.parse(io.StringIO(content))
-                        self.subtitles = list(parsed.events)  # Convert EventsSection to list
-                        logging.info(f"Loaded {len(self.subtitles)} ASS/SSA subtitles")
-                        logging.debug(f"First subtitle: {self.subtitles[0] if self.subtitles else 'None'}")
-                    except Exception as e:
-                        logging.error(f"ASS/SSA parse error: {str(e)}")
-                        logging.error(f"Traceback: {traceback.format_exc()}")
-                        # If parsing fails, try to load as plain text
-                        self.subtitles = self.parse_ssa_as_plain_text(content)
-                elif file_extension.lower() == '.vtt':
-                    self.subtitles = list(webvtt.read(file_name))
-                
-                logging.info(f"Loaded {len(self.subtitles)} subtitles")
-                logging.debug(f"Subtitle type: {type(self.subtitles)}")
-                logging.debug(f"First subtitle: {self.subtitles[0] if self.subtitles else 'None'}")
-                
-                self.subtitle_label.setText("Subtitles loaded successfully. Press Play to start.")
-                self.subtitle_position = 0
-                self.play_pause_button.setEnabled(True)
+        track = None
+        if file_extension.lower() in MATROSKA_EXTENSIONS and ask_track:
+            track = self.choose_matroska_track(file_name)
+            if track is None:
+                return
+        elif file_extension.lower() not in SUPPORTED_EXTENSIONS:
+            logging.error("Unsupported file format: %s", file_extension)
+            self.subtitle_label.setText(f"Unsupported file format: {file_extension}")
+            return
+
+        self.stop_live_input()
+        # A newer file supersedes any load still in flight; the current file keeps playing until the swap
+        if self.load_task:
+            self.load_task.cancel()
+        self.load_generation += 1
+        self.load_task = SubtitleLoadTask(file_name, self.load_generation, track)
+        self.load_task.signals.progress.connect(self.on_load_progress)
+        self.load_task.signals.partial.connect(self.on_subtitles_partial)
+        self.load_task.signals.finished.connect(self.on_subtitles_loaded)
+        self.load_task.signals.failed.connect(self.on_load_failed)
+        self.load_progress_bar.setValue(0)
+        self.load_progress_bar.show()
+        QThreadPool.globalInstance().start(self.load_task)
+
+    def on_load_progress(self, generation, percent):
+        if generation == self.load_generation:
+            self.load_progress_bar.setValue(percent)
+
+    def on_subtitles_partial(self, generation, timeline):
+        if generation == self.load_generation:
+            self.show_timeline(generation, timeline)
+
+    def on_subtitles_loaded(self, generation, timeline):
+        if generation != self.load_generation:
+            return
+        self.set_source_file(self.load_task.file_name)
+        self.load_task = None
+        self.load_progress_bar.hide()
+        self.show_timeline(generation, timeline)
+        self.build_search_index(generation, timeline)
+        self.check_timing()
+        self.start_watching()
+        self.prefetch_playlist()
+
+    def set_source_file(self, file_name):
+        self.current_file = file_name
+        self.source_retime = None
+        try:
+            self.source_key = file_cache_key(file_name) if file_name else None
+        except OSError:
+            self.source_key = None
+
+    def show_timeline(self, generation, timeline):
+        if generation == self.shown_generation:
+            # A larger snapshot of the file that is already showing: keep the playback position
+            previous = self.subtitles
+            self.engine.set_timeline(timeline, keep_position=True)
+            self.schedule_next_update()
+            if timeline.in_order and len(timeline) >= len(previous):
+                self.subtitle_model.append_timeline(timeline)
+            else:
                 self.populate_subtitle_list()
-            except Exception as e:
-                logging.error(f"Error loading subtitles: {str(e)}")
-                self.subtitle_label.setText(f"Error loading subtitles: {str(e)}")
-                # Log more details about the file
-                try:
-                    with io.open(file_name, 'r', encoding=detected_encoding) as f:
-                        first_lines = ''.join(f.readlines(10))  # Read first 10 lines
-                    logging.error(f"First 10 lines of the file:\n{first_lines}")
-                except Exception as read_error:
-                    logging.error(f"Error reading file content: {str(read_error)}")
+            return
+
+        self.shown_generation = generation
+        self.paused_row = -1
+        self.engine.set_timeline(timeline)
+        self.subtitle_label.setText("Subtitles loaded successfully. Press Play to start.")
+        self.schedule_next_update()
+        self.play_pause_button.setEnabled(True)
+        self.add_track_button.setEnabled(True)
+        self.retime_button.setEnabled(True)
+        self.save_subtitles_button.setEnabled(True)
+        self.populate_subtitle_list()
+        if self.play_when_loaded:
+            # A playlist entry that was not prefetched in time starts as soon as its first cues are in
+            self.play_when_loaded = False
+            self.engine.play(0)
+            self.play_pause_button.setText('Pause Subtitles')
+            self.schedule_next_update()
+
+    def set_playlist(self, file_names):
+        # Plays the files back to back; a single file plays on its own and loops as before
+        self.stop_live_input()
+        self.playlist = list(file_names)
+        self.playlist_generation += 1
+        self.prefetched = {}
+        self.prefetch_tasks = {}
+        self.play_when_loaded = False
+        self.playlist_index = 0 if self.playlist else -1
+        self.engine.looping = len(self.playlist) < 2
+        self.update_playlist_view()
+        if self.playlist:
+            self.load_subtitles(self.playlist[0], ask_track=len(self.playlist) == 1)
+            logging.info("Playlist of %s files", len(self.playlist))
+
+    def update_playlist_view(self):
+        self.playlist_view.clear()
+        self.playlist_view.addItems(os.path.basename(file_name) for file_name in self.playlist)
+        if self.playlist_index >= 0:
+            self.playlist_view.setCurrentRow(self.playlist_index)
+        self.playlist_view.setVisible(len(self.playlist) > 1)
+
+    def prefetch_playlist(self):
+        # Keeps the next PLAYLIST_PREFETCH_AHEAD entries parsed, indexed and render-cached; anything
+        # else that was prefetched is released so memory stays bounded
+        if len(self.playlist) < 2 or self.playlist_index < 0:
+            return
+        wanted = {(self.playlist_index + offset) % len(self.playlist)
+                  for offset in range(1, PLAYLIST_PREFETCH_AHEAD + 1)} - {self.playlist_index}
+        self.prefetched = {index: entry for index, entry in self.prefetched.items() if index in wanted}
+        self.prefetch_tasks = {index: task for index, task in self.prefetch_tasks.items() if index in wanted}
+        for index in sorted(wanted - set(self.prefetched) - set(self.prefetch_tasks)):
+            task = PlaylistPrefetchTask(self.playlist[index], self.playlist_generation, index, self.timing_check)
+            task.signals.finished.connect(self.on_playlist_prefetched)
+            task.signals.failed.connect(self.on_playlist_prefetch_failed)
+            self.prefetch_tasks[index] = task
+            QThreadPool.globalInstance().start(task)
+
+    def on_playlist_prefetched(self, generation, index, entry):
+        if generation != self.playlist_generation or self.prefetch_tasks.get(index) is None:
+            return
+        del self.prefetch_tasks[index]
+        self.prefetched[index] = entry
+        logging.info("Prefetched %s (%s subtitles)", os.path.basename(entry.file_name), len(entry.timeline))
+
+    def on_playlist_prefetch_failed(self, generation, index, message):
+        if generation != self.playlist_generation or self.prefetch_tasks.pop(index, None) is None:
+            return
+        # Left to the normal load when its turn comes, which reports the error
+        logging.warning("Could not prefetch %s: %s", self.playlist[index], message)
+
+    def advance_playlist(self):
+        self.play_playlist_entry((self.playlist_index + 1) % len(self.playlist))
+
+    def play_playlist_entry(self, index):
+        if not 0 <= index < len(self.playlist):
+            return
+        self.playlist_index = index
+        self.playlist_view.setCurrentRow(index)
+        entry = self.prefetched.pop(index, None)
+        if entry is None:
+            # Not prefetched yet, or the prefetch failed
+            self.subtitle_timer.stop()
+            self.play_when_loaded = True
+            self.load_subtitles(self.playlist[index], ask_track=False)
+            return
+        self.switch_to_prefetched(entry)
+
+    def switch_to_prefetched(self, entry):
+        # Everything heavy was done by the prefetch task: this only swaps references, seeks the
+        # cursors (O(log n)) and resets the list model, whose rows are formatted when painted
+        started = time.perf_counter()
+        if self.load_task:
+            self.load_task.cancel()
+            self.load_task = None
+            self.load_progress_bar.hide()
+        self.load_generation += 1
+        self.shown_generation = self.load_generation
+        self.set_source_file(entry.file_name)
+        self.paused_row = -1
+        self.engine.set_timeline(entry.timeline)
+        self.engine.play(0)
+        self.play_pause_button.setText('Pause Subtitles')
+        self.schedule_next_update()
+        self.subtitle_model.set_timeline(entry.timeline)
+        if self.timing_check and entry.timing_report:
+            self.subtitle_model.set_timing_report(entry.timing_report)
+            self.search_model.set_timing_report(entry.timing_report)
+            self.timing_check_checkbox.setToolTip(entry.timing_report.summary())
         else:
-            logging.error(f"Unsupported file format: {file_extension}")
-            self.subtitle_label.setText(f"Unsupported file format: {file_extension}")
-        self.current_subtitle_index = 0
-
-    def parse_ssa_as_plain_text(self, content):
-        lines = content.split('\n')
-        subtitles = []
-        for line in lines:
-            if line.startswith('Dialogue:'):
-                parts = line.split(',')
-                if len(parts) >= 4:
-                    start = parts[1].strip()
-                    end = parts[2].strip()
-                    text = ','.join(parts[3:]).strip()
-                    subtitles.append({'start': start, 'end': end, 'text': text})
-        return subtitles
+            self.check_timing()  # Timing check was switched on or off since the prefetch
+        self.search_task = None
+        self.search_index = entry.search_index
+        self.search_box.setEnabled(True)
+        self.search_box.setPlaceholderText('Search subtitles')
+        self.search_subtitles(self.search_box.text())
+        self.start_watching()
+        self.prefetch_playlist()
+        logging.info("Switched to %s in %.2f ms",
+                     os.path.basename(entry.file_name), (time.perf_counter() - started) * 1000)
+
+    def add_subtitle_track(self):
+        file_name, _ = QFileDialog.getOpenFileName(self, "Add Subtitle Track", "", OPEN_FILE_FILTER)
+        if file_name:
+            self.load_subtitle_track(file_name)
+
+    def load_subtitle_track(self, file_name):
+        # Extra tracks play on the main track's clock, so one must already be loaded
+        if not self.subtitles:
+            self.load_subtitles(file_name)
+            return
+        logging.info("Loading subtitle track from file: %s", file_name)
+        track = None
+        if os.path.splitext(file_name)[1].lower() in MATROSKA_EXTENSIONS:
+            track = self.choose_matroska_track(file_name)
+            if track is None:
+                return
+        self.track_generation += 1
+        task = SubtitleLoadTask(file_name, self.track_generation, track)
+        task.signals.finished.connect(self.on_track_loaded)
+        task.signals.failed.connect(self.on_track_load_failed)
+        self.track_tasks[self.track_generation] = (task, file_name)
+        QThreadPool.globalInstance().start(task)
+
+    def on_track_loaded(self, generation, timeline):
+        _, file_name = self.track_tasks.pop(generation)
+        number = len(self.subtitle_tracks)
+        track = self.engine.add_track(timeline)
+        controls = SubtitleTrackControls(file_name, track, QColor(TRACK_COLORS[number % len(TRACK_COLORS)]),
+                                         TRACK_POSITIONS[number % len(TRACK_POSITIONS)])
+        controls.changed.connect(self.update_subtitle_track)
+        controls.removed.connect(self.remove_subtitle_track)
+        controls.label.set_style(controls.color, self.current_font)
+        track.subscribe(controls.label.show_cues)
+        self.subtitle_tracks.append(controls)
+        self.tracks_layout.addWidget(controls)
+        self.arrange_track_labels()
+        if self.subtitle_display:
+            self.subtitle_display.add_track(controls)
+        track.publish()
+        self.schedule_next_update()  # The new track may have the nearest boundary
+        logging.info("Added subtitle track with %s subtitles", len(timeline))
+
+    def on_track_load_failed(self, generation, message):
+        _, file_name = self.track_tasks.pop(generation)
+        logging.error("Error loading subtitle track %s: %s", file_name, message)
+        self.subtitle_label.setText(f"Error loading subtitle track: {message}")
+
+    def update_subtitle_track(self, controls):
+        controls.label.set_style(controls.color, self.current_font)
+        self.arrange_track_labels()
+        if self.subtitle_display:
+            self.subtitle_display.update_track(controls)
+
+    def remove_subtitle_track(self, controls):
+        self.engine.remove_track(controls.track)
+        controls.track.unsubscribe(controls.label.show_cues)
+        if self.subtitle_display:
+            self.subtitle_display.remove_track(controls)
+        self.subtitle_tracks.remove(controls)
+        controls.label.deleteLater()
+        controls.deleteLater()
+        self.schedule_next_update()
+
+    def arrange_track_labels(self):
+        # Track labels sit above the main subtitles, ordered by their vertical position
+        for controls in sorted(self.subtitle_tracks, key=lambda controls: controls.position):
+            self.track_labels_layout.removeWidget(controls.label)
+            self.track_labels_layout.addWidget(controls.label)
+
+    def toggle_watch_file(self, state):
+        self.watch_file = state == Qt.CheckState.Checked.value
+        self.save_settings()
+        self.start_watching()
+        logging.info("Watch file for changes: %s", self.watch_file)
+
+    def stop_watching(self):
+        if self.file_watcher.files():
+            self.file_watcher.removePaths(self.file_watcher.files())
+        self.watched_file = None
+        self.watch_task = None  # Results of a parse still running are ignored
+        self.watch_pending = False
+
+    def start_watching(self):
+        # Called for every newly loaded file; watches it when watching is turned on
+        self.stop_watching()
+        if not self.watch_file or not self.current_file:
+            return
+        if self.source_retime:
+            return  # Reloads would patch cues from disk into retimed ones
+        if os.path.splitext(self.current_file)[1].lower() not in SUPPORTED_EXTENSIONS:
+            return  # Subtitles inside a Matroska file are not watched
+        self.file_watcher.addPath(self.current_file)
+        self.watch_task = WatchTask(WatchedSubtitleFile(self.current_file), self.load_generation, reload=False)
+        self.watch_task.signals.loaded.connect(self.on_watch_loaded)
+        self.watch_task.signals.failed.connect(self.on_watch_failed)
+        QThreadPool.globalInstance().start(self.watch_task)
+
+    def on_watch_loaded(self, generation):
+        if generation != self.load_generation or not self.watch_task:
+            return
+        self.watched_file = self.watch_task.watched_file
+        self.watch_task = None
+        logging.info("Watching %s for changes", self.current_file)
+        if self.watch_pending:
+            self.reload_watched_file()
+
+    def on_watched_file_changed(self, path):
+        # Editors that save by replacing the file make the watcher drop the path
+        if path not in self.file_watcher.files() and os.path.exists(path):
+            self.file_watcher.addPath(path)
+        self.watch_timer.start(WATCH_DELAY)
+
+    def reload_watched_file(self):
+        if not self.watched_file or self.watch_task:
+            self.watch_pending = True  # Picked up when the running parse finishes
+            return
+        self.watch_pending = False
+        self.watch_task = WatchTask(self.watched_file, self.load_generation, reload=True)
+        self.watch_task.signals.reloaded.connect(self.on_watch_reloaded)
+        self.watch_task.signals.failed.connect(self.on_watch_failed)
+        QThreadPool.globalInstance().start(self.watch_task)
+
+    def on_watch_reloaded(self, generation, result):
+        if generation != self.load_generation or not self.watch_task:
+            return
+        self.watch_task = None
+        if result:
+            timeline, first, removed, added = result
+            # Playback carries on from the current position with the patched cues
+            self.engine.set_timeline(timeline, keep_position=True)
+            self.schedule_next_update()
+            if first is None:
+                self.populate_subtitle_list()
+                logging.info("Reloaded %s", self.current_file)
+            else:
+                self.subtitle_model.patch_rows(timeline, first, removed, added)
+                logging.info("Reloaded %s: %s cues replaced by %s", self.current_file, removed, added)
+            self.build_search_index(generation, timeline)
+            self.check_timing()
+            self.set_source_file(self.current_file)
+        if self.watch_pending:
+            self.reload_watched_file()
+
+    def on_watch_failed(self, generation, message):
+        if generation != self.load_generation or not self.watch_task:
+            return
+        self.watch_task = None
+        logging.warning("Could not reload %s: %s", self.current_file, message)
+        if self.watch_pending:
+            self.reload_watched_file()
+
+    def toggle_timing_check(self, state):
+        self.timing_check = state == Qt.CheckState.Checked.value
+        self.save_settings()
+        summary = self.check_timing()
+        if summary:
+            self.subtitle_label.setText(summary)
+
+    def check_timing(self):
+        # Flags overlaps, short gaps, bad durations and fast reading speeds as list highlights.
+        # NumPy is only imported once timing is checked, so it does not slow down startup.
+        if not self.timing_check or not self.subtitles:
+            self.subtitle_model.set_timing_report(None)
+            self.search_model.set_timing_report(None)
+            return None
+        from subtitle_timing import analyze_timing
+        started = time.perf_counter()
+        report = analyze_timing(self.subtitles)
+        self.subtitle_model.set_timing_report(report)
+        self.search_model.set_timing_report(report)
+        summary = report.summary()
+        self.timing_check_checkbox.setToolTip(summary)
+        logging.info("%s (checked in %.1f ms)", summary, (time.perf_counter() - started) * 1000)
+        return summary
+
+    def retime_subtitles(self):
+        from subtitle_timing import parse_retime, retime_timeline
+        spec, ok = QInputDialog.getText(self, "Retime Subtitles",
+                                        "shift MS, scale FACTOR, fps FROM TO (e.g. fps 23.976 25)\n"
+                                        "or sync OLD=NEW OLD=NEW (e.g. sync 00:01:00,000=00:01:02,000 "
+                                        "01:30:00,000=01:30:05,500):", text=self.retime_spec)
+        if not ok or not self.subtitles:
+            return
+        try:
+            scale, shift = parse_retime(spec)
+        except ValueError as e:
+            self.subtitle_label.setText(str(e))
+            return
+        self.retime_spec = spec.strip()
+        self.save_settings()
+        started = time.perf_counter()
+        timeline = retime_timeline(self.subtitles, scale, shift)
+        # Saving in the source format applies the combined retime to the file's own text
+        previous_scale, previous_shift = self.source_retime or (1.0, 0.0)
+        self.source_retime = (previous_scale * scale, previous_shift * scale + shift)
+        if self.watched_file or self.watch_task:
+            self.stop_watching()
+            logging.info("Stopped watching %s: save the retimed subtitles to keep them", self.current_file)
+        # The list keeps its row when no cue was dropped before zero
+        row = self.subtitle_list.currentIndex().row()
+        self.engine.set_timeline(timeline, keep_position=True)
+        self.schedule_next_update()
+        self.populate_subtitle_list()
+        if 0 <= row < len(timeline) and len(timeline) == self.subtitle_model.rowCount():
+            self.subtitle_list.setCurrentIndex(self.subtitle_model.index(row))
+        self.build_search_index(self.load_generation, timeline)
+        self.check_timing()
+        logging.info("Retimed %s cues with scale %g and shift %.0f ms in %.1f ms",
+                     len(timeline), scale, shift, (time.perf_counter() - started) * 1000)
+
+    def save_subtitles(self):
+        if not self.subtitles:
+            return
+        suggested = ""
+        if self.current_file:
+            # Never the open file itself, so saving does not overwrite it by default
+            base, extension = os.path.splitext(self.current_file)
+            if extension.lower() not in REWRITE_EXTENSIONS:
+                extension = '.srt'  # e.g. a track read from a Matroska file
+            suggested = f"{base}.{'retimed' if self.source_retime else 'copy'}{extension}"
+        file_name, _ = QFileDialog.getSaveFileName(self, "Save Subtitles", suggested,
+                                                   "Subtitle Files (*.srt *.vtt *.ass *.ssa)")
+        if file_name:
+            self.write_subtitles(file_name)
+
+    def can_rewrite_source(self, extension):
+        # The open file is still as it was read and has the target format, so its own text can be
+        # copied with new timestamps instead of being regenerated from the parsed cues
+        if not self.current_file or os.path.splitext(self.current_file)[1].lower() != extension:
+            return False
+        try:
+            return extension in REWRITE_EXTENSIONS and file_cache_key(self.current_file) == self.source_key
+        except OSError:
+            return False
+
+    def write_subtitles(self, file_name):
+        extension = os.path.splitext(file_name)[1].lower()
+        if extension not in WRITERS and extension not in REWRITE_EXTENSIONS:
+            extension = os.path.splitext(self.current_file or '')[1].lower()
+            extension = extension if extension in WRITERS else '.srt'
+            file_name += extension
+        lossless = self.can_rewrite_source(extension)
+        if not lossless:
+            if extension not in WRITERS:  # .ssa is only copied, new files are written as .ass
+                extension = '.ass'
+                file_name = os.path.splitext(file_name)[0] + extension
+            # Regenerated files keep only bold, italic, underline and strikeout
+            if os.path.exists(file_name) and QMessageBox.warning(
+                    self, "Save Subtitles",
+                    f"{os.path.basename(file_name)} will be rewritten from the parsed cues. Styles, "
+                    f"positioning, colors and other markup besides bold, italic, underline and "
+                    f"strikeout are not kept. Overwrite it?",
+                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                    QMessageBox.StandardButton.No) != QMessageBox.StandardButton.Yes:
+                return
+        try:
+            if lossless:
+                write_retimed_source(self.current_file, file_name, *(self.source_retime or (1.0, 0.0)))
+            else:
+                write_cues(file_name, self.subtitles, extension)
+        except OSError as e:
+            self.subtitle_label.setText(f"Could not save subtitles: {str(e)}")
+            return
+        if lossless and os.path.abspath(file_name) == os.path.abspath(self.current_file):
+            self.set_source_file(file_name)  # The file on disk now has the retimed cues
+            self.start_watching()
+        logging.info("Saved %s subtitles to %s%s",
+                     len(self.subtitles), file_name, '' if lossless else ' (markup other than b/i/u/s not kept)')
+
+    def build_search_index(self, generation, timeline):
+        # Built off the GUI thread once the whole file is loaded; until then searching is disabled
+        self.search_index = None
+        self.search_box.setEnabled(False)
+        self.search_box.setPlaceholderText('Building search index...')
+        self.search_task = SearchIndexTask(timeline, generation)
+        self.search_task.signals.finished.connect(self.on_search_index_built)
+        QThreadPool.globalInstance().start(self.search_task)
+
+    def on_search_index_built(self, generation, index):
+        if generation != self.load_generation or index.timeline is not self.subtitles:
+            return
+        self.search_task = None
+        self.search_index = index
+        self.search_box.setEnabled(True)
+        self.search_box.setPlaceholderText('Search subtitles')
+        self.search_subtitles(self.search_box.text())
+        logging.info("Search index built with %s words", len(index.postings))
+
+    def search_subtitles(self, query):
+        if not self.search_index or not query.strip():
+            self.search_model.set_results(self.subtitles, [])
+            self.search_results.hide()
+            return
+        results = self.search_index.search(query)
+        self.search_model.set_results(self.search_index.timeline, results)
+        self.search_results.setVisible(True)
+        logging.debug("Search for %r found %d cues", query, len(results))
+
+    def jump_to_first_search_result(self):
+        if self.search_model.rowCount():
+            self.jump_to_search_result(self.search_model.index(0))
+
+    def jump_to_search_result(self, model_index):
+        if not model_index.isValid():
+            return
+        row = self.search_model.indices[model_index.row()]
+        self.start_from_selected_subtitle(self.subtitle_model.index(row))
+
+    def on_load_failed(self, generation, message):
+        if generation != self.load_generation:
+            return
+        self.load_task = None
+        self.load_progress_bar.hide()
+        self.subtitle_label.setText(f"Error loading subtitles: {message}")
 
     def populate_subtitle_list(self):
-        self.subtitle_list.clear()
-        if isinstance(self.subtitles, pysrt.SubRipFile):  # SRT format
-            for subtitle in self.subtitles:
-                item = QListWidgetItem(f"{subtitle.start} - {subtitle.end}\n{subtitle.text}")
-                self.subtitle_list.addItem(item)
-        elif isinstance(self.subtitles, list):  # ASS/SSA or VTT format
-            for subtitle in self.subtitles:
-                if isinstance(subtitle, ass.line.Dialogue):  # ASS/SSA format
-                    item = QListWidgetItem(f"{subtitle.start} - {subtitle.end}\n{subtitle.text}")
-                elif hasattr(subtitle, 'start') and hasattr(subtitle, 'end') and hasattr(subtitle, 'text'):  # Generic format (including VTT)
-                    item = QListWidgetItem(f"{subtitle.start} - {subtitle.end}\n{subtitle.text}")
-                elif isinstance(subtitle, dict):  # Plain text parsed SSA
-                    item = QListWidgetItem(f"{subtitle['start']} - {subtitle['end']}\n{subtitle['text']}")
-                else:
-                    item = QListWidgetItem(f"Unknown format: {str(subtitle)}")
-                self.subtitle_list.addItem(item)
-        else:
-            logging.error(f"Unknown subtitle format: {type(self.subtitles)}")
-            self.subtitle_list.addItem(QListWidgetItem("Error: Unknown subtitle format"))
+        self.subtitle_model.set_timeline(self.subtitles)
         
-        logging.info(f"Populated subtitle list with {self.subtitle_list.count()} items")
-        if self.subtitle_list.count() == 0:
+        logging.info("Populated subtitle list with %s items", self.subtitle_model.rowCount())
+        if self.subtitle_model.rowCount() == 0:
             logging.warning("No subtitles were added to the list")
 
-    def start_from_selected_subtitle(self, item):
-        index = self.subtitle_list.row(item)
+    def start_from_selected_subtitle(self, model_index):
+        index = model_index.row()
         if index >= 0:
-            self.subtitle_position = self.get_start_time(self.subtitles[index]) // 50
+            self.seek_to(self.subtitles[index].start)
         
         if self.start_from_selected_line:
             self.update_subtitle()
-            if not self.subtitle_playing:
+            if not self.engine.playing:
                 self.play_pause_subtitles()
         else:
-            self.subtitle_list.setCurrentRow(index)
+            self.subtitle_list.setCurrentIndex(model_index)
+            self.subtitle_list.scrollTo(model_index, QAbstractItemView.ScrollHint.PositionAtCenter)
 
     def change_background_color(self):
         color = QColorDialog.getColor()
@@ -334,7 +1277,7 @@ class SubtitleReader(QMainWindow):
             self.update_subtitle_style()
             if self.subtitle_display:
                 self.subtitle_display.set_font(font)
-            logging.info(f"Font changed to {font.family()}, {font.pointSize()}pt")
+            logging.info("Font changed to %s, %spt", font.family(), font.pointSize())
 
     def change_subtitle_color(self):
         color = QColorDialog.getColor(self.subtitle_color, self, "Choose Subtitle Color")
@@ -343,7 +1286,7 @@ class SubtitleReader(QMainWindow):
             self.update_subtitle_style()
             if self.subtitle_display:
                 self.subtitle_display.set_subtitle_color(color)
-            logging.info(f"Subtitle color changed to {color.name()}")
+            logging.info("Subtitle color changed to %s", color.name())
 
     def update_subtitle_style(self):
         self.subtitle_label.setStyleSheet(f"""
@@ -352,116 +1295,269 @@ class SubtitleReader(QMainWindow):
             font-size: {self.current_font.pointSize()}px;
         """)
         self.subtitle_label.setTextFormat(Qt.TextFormat.RichText)
+        for controls in self.subtitle_tracks:
+            controls.label.set_style(controls.color, self.current_font)
 
     def update_subtitle(self):
-        if not self.subtitles or not self.subtitle_playing:
-            return
-
-        current_time = self.elapsed_timer.elapsed()
-        time_diff = current_time - self.last_update_time
-        self.last_update_time = current_time
-
-        # Adjust subtitle_position based on actual elapsed time
-        self.subtitle_position += time_diff
-
-        # Find the most relevant subtitle for the current time
-        current_subtitle = None
-        for subtitle in self.subtitles:
-            start_time = self.get_start_time(subtitle)
-            end_time = self.get_end_time(subtitle)
-            
-            if start_time <= self.subtitle_position < end_time:
-                current_subtitle = subtitle
-                break
-            elif self.subtitle_position < start_time:
-                break
-
-        # Update the displayed subtitle
-        if current_subtitle:
-            text = self.get_subtitle_text(current_subtitle)
-            if text != self.current_subtitle_text:
-                self.subtitle_label.setText(text)
-                self.current_subtitle_text = text
-                if self.subtitle_display:
-                    self.subtitle_display.set_text(text)
-                logging.debug(f"Displaying subtitle: {text} (Time: {self.subtitle_position}ms, Start: {start_time}ms, End: {end_time}ms)")
-        else:
-            if self.current_subtitle_text:
-                self.subtitle_label.setText("")
-                self.current_subtitle_text = ""
-                if self.subtitle_display:
-                    self.subtitle_display.set_text("")
-
-        # Loop back to the beginning if we've reached the end
-        if self.subtitle_position > self.get_end_time(self.subtitles[-1]):
-            self.subtitle_position = 0
-            self.elapsed_timer.restart()
-            self.last_update_time = 0
-            logging.info("Subtitle playback looped to beginning")
-
-        # Schedule the next update
-        self.subtitle_timer.setInterval(10)  # Update every 10ms for more precise timing
-
-    def get_start_time(self, subtitle):
-        if isinstance(self.subtitles, pysrt.SubRipFile):
-            return subtitle.start.ordinal
+        if not self.subtitles or not self.engine.playing:
+            return
+        stats = self.playback_stats
+        if stats:
+            started = time.perf_counter_ns()
+        self.engine.update()
+        if self.playlist_index >= 0 and not self.engine.looping and self.engine.next_boundary() is None:
+            if not self.play_when_loaded:
+                self.advance_playlist()  # Every cue of this file has ended
         else:
-            return self.time_to_milliseconds(subtitle.start)
+            self.schedule_next_update()
+        if stats:
+            stats.record_tick((time.perf_counter_ns() - started) / 1e6)
 
-    def get_end_time(self, subtitle):
-        if isinstance(self.subtitles, pysrt.SubRipFile):
-            return subtitle.end.ordinal
+    def schedule_next_update(self):
+        if not self.engine.playing:
+            return
+        if self.event_driven_timing:
+            # Sleep until the next cue starts or ends, or until the loop point after the last cue
+            interval = self.engine.time_until_next_boundary()
+            if interval is None:  # Nothing left to show until more live cues arrive
+                self.subtitle_timer.stop()
+                return
+            self.subtitle_timer.setSingleShot(True)
         else:
-            return self.time_to_milliseconds(subtitle.end)
-
-    def get_subtitle_text(self, subtitle):
-        if isinstance(self.subtitles, pysrt.SubRipFile):
-            text = subtitle.text
-        elif isinstance(subtitle, ass.line.Dialogue):
-            text = subtitle.text
-        elif isinstance(subtitle, dict):  # Plain text parsed SSA
-            text = subtitle['text']
-        elif hasattr(subtitle, 'text'):  # Generic format (including VTT)
-            text = subtitle.text
+            interval = 10  # Update every 10ms for more precise timing
+            self.subtitle_timer.setSingleShot(False)
+        self.subtitle_timer.start(interval)
+        if self.playback_stats:
+            self.playback_stats.expect_wakeup(interval)
+
+    def record_wakeup(self):
+        self.wakeups.record()
+        if self.playback_stats:
+            self.playback_stats.record_wakeup()
+
+    def toggle_playback_stats(self, state):
+        self.set_playback_stats(state == Qt.CheckState.Checked.value)
+        self.save_settings()
+
+    def set_playback_stats(self, enabled):
+        self.show_playback_stats = enabled
+        if enabled and not self.playback_stats:
+            self.playback_stats = PlaybackStats(self.wakeups)
+            if self.engine.playing:
+                self.playback_stats.start_segment(self.engine.position)
+            self.stats_timer.start(STATS_REFRESH_INTERVAL)
+        elif not enabled and self.playback_stats:
+            self.export_playback_stats()
+            self.playback_stats = None
+            self.stats_timer.stop()
+        self.engine.stats = self.playback_stats
+        self.refresh_stats_overlay()
+        logging.info("Playback stats: %s", enabled)
+
+    def refresh_stats_overlay(self):
+        text = self.playback_stats.overlay_text() if self.playback_stats else None
+        if text is not None and self.sync_source:
+            text += '\n' + self.sync_controller.status()
+        if text is not None and self.live_stream:
+            text += '\n' + self.live_status()
+        self.stats_label.setVisible(text is not None)
+        if text is not None:
+            self.stats_label.setText(text)
+        if self.subtitle_display:
+            self.subtitle_display.set_stats_text(text)
+
+    def export_playback_stats(self, base_name=STATS_EXPORT_NAME):
+        if not self.playback_stats or not self.playback_stats.tick_ms.count:
+            return
+        try:
+            self.playback_stats.export_json(base_name + '.json')
+            self.playback_stats.export_csv(base_name + '.csv')
+            logging.info("Playback stats written to %s.json and %s.csv", base_name, base_name)
+        except OSError as e:
+            logging.warning("Could not write playback stats: %s", e)
+
+    def toggle_live_input(self):
+        if self.live_stream:
+            self.stop_live_input()
+            return
+        address, ok = QInputDialog.getText(self, "Live Input",
+                                           "Read SRT/WebVTT cues from (- for stdin, a file or FIFO path, "
+                                           "or tcp:host:port to listen on):", text=self.live_address)
+        if ok and address.strip():
+            self.start_live_input(address.strip())
+
+    def set_live_window(self, count):
+        self.live_window = count
+        self.save_settings()
+        if self.live_stream:
+            self.live_cues = deque(self.live_cues, maxlen=count)
+            self.engine.set_timeline(CueTimeline(self.live_cues), keep_position=True)
+            self.schedule_next_update()
+            self.populate_subtitle_list()
+
+    def start_live_input(self, address):
+        self.stop_live_input()
+        try:
+            signals = LiveSignals()
+            signals.cues.connect(self.on_live_cues)
+            signals.failed.connect(self.on_live_failed)
+            stream = open_cue_stream(address, signals.cues.emit, signals.failed.emit)
+        except ValueError as e:
+            self.subtitle_label.setText(str(e))
+            return
+        # Anything still loading for a file is dropped, and so is the file itself
+        if self.load_task:
+            self.load_task.cancel()
+            self.load_task = None
+            self.load_progress_bar.hide()
+        self.load_generation += 1
+        self.shown_generation = self.load_generation
+        self.set_source_file(None)
+        self.set_playlist([])
+        self.start_watching()
+        self.search_index = None
+        self.search_box.setEnabled(False)
+        self.search_box.setPlaceholderText('Search is off during live input')
+        self.subtitle_timer.stop()
+        self.engine.pause()
+        self.engine.looping = False
+        self.engine.set_timeline(CueTimeline([]))
+        self.subtitle_model.set_timeline(self.subtitles)
+
+        self.live_address = address
+        self.save_settings()
+        self.live_signals = signals
+        self.live_stream = stream
+        self.live_cues = deque(maxlen=self.live_window)
+        self.live_latency = Metric()
+        self.live_stream.start()
+        self.live_button.setText('Stop Live Input')
+        self.play_pause_button.setEnabled(True)
+        self.subtitle_label.setText(f"Waiting for live cues from {address}")
+        logging.info("Reading live cues from %s, keeping the last %s", address, self.live_window)
+
+    def apply_arguments(self, arguments):
+        # Command line options shared by the launchers, e.g. captioner | python subtitle_reader.py --live -
+        if '--live' in arguments[1:-1]:
+            self.start_live_input(arguments[arguments.index('--live') + 1])
+
+    def stop_live_input(self):
+        if not self.live_stream:
+            return
+        self.live_stream.stop()
+        self.live_stream = None
+        self.live_signals = None
+        self.engine.looping = True
+        self.live_button.setText('Live Input...')
+        logging.info("Stopped live input: %s", self.live_status())
+
+    def on_live_cues(self, cues, received):
+        if not self.live_stream:
+            return
+        window = self.live_cues
+        window.extend(cues)
+        timeline = self.subtitles
+        first_cues = not self.engine.playing and not timeline
+        # Cues are appended to the timeline in place, O(k log n) per batch. It is rebuilt from the
+        # window only once it has grown a quarter past it (or cues arrive out of order), so the
+        # O(window) rebuild is spread over many batches.
+        limit = window.maxlen + max(window.maxlen // LIVE_TRIM_SLACK, 1)
+        if (timeline and timeline is self.subtitle_model.timeline and len(timeline) + len(cues) <= limit
+                and timeline.can_extend(cues)):
+            self.subtitle_model.extend_timeline(cues)
+            dropped = None
         else:
-            text = str(subtitle)
-    
-        # Replace /N and \N with actual newline
-        text = re.sub(r'/N|\\N', '\n', text)
-    
-        # Handle italics
-        text = re.sub(r'{\\i1}(.*?){\\i0}', r'<i>\1</i>', text)  # ASS/SSA italics
-        text = re.sub(r'<i>(.*?)</i>', r'<i>\1</i>', text)  # HTML-style italics
-    
-        # Remove other {...} style tags
-        text = re.sub(r'{\\[^}]+}', '', text)
-    
-        # Remove other <...> style tags except <i> and </i>
-        text = re.sub(r'<(?!/?(i|I)>)[^>]+>', '', text)
-    
-        return text.strip()
-
-    def time_to_milliseconds(self, time_str):
-        if isinstance(time_str, str):
-            if ':' in time_str:  # SRT or ASS/SSA format
-                parts = time_str.replace(',', '.').split(':')
-                if len(parts) == 3:
-                    h, m, s = parts
-                    s, ms = s.split('.')
-                return (int(h) * 3600 + int(m) * 60 + int(s)) * 1000 + int(ms.ljust(3, '0'))
-            elif len(parts) == 4:  # ASS/SSA format with 10ths of second
-                h, m, s, cs = parts
-                return (int(h) * 3600 + int(m) * 60 + int(s)) * 1000 + int(cs) * 10
-            else:  # Assume it's already in milliseconds
-                return int(float(time_str))
+            kept = len(timeline) if timeline else 0
+            dropped = min(kept, max(0, kept + len(cues) - len(window)))
+            timeline = CueTimeline(window)
+        self.engine.set_timeline(timeline, keep_position=True)
+        if first_cues:
+            # Live playback starts at the first cue and then runs on the engine's clock
+            self.engine.play(timeline[0].start)
+            self.play_pause_button.setText('Pause Subtitles')
+        elif self.engine.playing and cues[-1].end <= self.engine.current_position():
+            # The upstream clock is behind ours: catch up so the newest cue is still shown
+            self.engine.seek(cues[-1].start)
+        self.schedule_next_update()
+        if dropped is None:
+            pass  # The list shares the extended timeline and already has the new rows
+        elif timeline.in_order and dropped <= self.subtitle_model.rowCount():
+            self.subtitle_model.slide_timeline(timeline, dropped)
         else:
-            return int(time_str.total_seconds() * 1000)
+            self.populate_subtitle_list()
+        latency = monotonic_ms() - received
+        for _ in cues:
+            self.live_latency.add(latency)
+        logging.debug("Live input: %d cues shown %.1f ms after they arrived", len(cues), latency)
+
+    def on_live_failed(self, message):
+        logging.error("Live input failed: %s", message)
+        self.stop_live_input()
+        self.subtitle_label.setText(f"Live input failed: {message}")
+
+    def live_status(self):
+        latency = self.live_latency.summary()
+        return (f"live: {latency['count']} cues, {len(self.live_cues or ())} kept, ingest-to-display "
+                f"p50 {latency['p50']:.1f} ms p99 {latency['p99']:.1f} ms max {latency['max']:.1f} ms")
+
+    def toggle_player_sync(self):
+        if self.sync_source:
+            self.stop_player_sync()
+            return
+        address, ok = QInputDialog.getText(self, "Sync to Player",
+                                           "Player address (mpv:/path/to/socket, udp:host:port or tcp:host:port):",
+                                           text=self.sync_address)
+        if ok and address.strip():
+            self.start_player_sync(address.strip())
+
+    def start_player_sync(self, address):
+        try:
+            self.sync_signals = SyncSignals()
+            self.sync_signals.sample.connect(self.on_sync_sample)
+            self.sync_signals.failed.connect(self.on_sync_failed)
+            self.sync_source = open_sync_source(address, self.sync_signals.sample.emit, self.sync_signals.failed.emit)
+        except ValueError as e:
+            self.sync_source = None
+            self.subtitle_label.setText(str(e))
+            return
+        self.sync_address = address
+        self.save_settings()
+        self.sync_controller = SyncController(self.engine)
+        self.sync_source.start()
+        self.sync_button.setText('Stop Sync')
+        logging.info("Following player clock at %s", address)
+
+    def stop_player_sync(self):
+        if not self.sync_source:
+            return
+        self.sync_source.stop()
+        self.sync_source = None
+        self.sync_signals = None
+        self.sync_button.setText('Sync to Player')
+        logging.info("Stopped player sync: %s", self.sync_controller.status())
+
+    def on_sync_sample(self, sample):
+        if not self.sync_source:
+            return
+        self.sync_controller.apply(sample)
+        self.play_pause_button.setText('Pause Subtitles' if self.engine.playing else 'Play Subtitles')
+        self.schedule_next_update()
+
+    def on_sync_failed(self, message):
+        logging.error("Player sync failed: %s", message)
+        self.stop_player_sync()
+        self.subtitle_label.setText(f"Player sync failed: {message}")
 
     def toggle_fullscreen_subtitles(self):
         if not self.subtitle_display:
             self.subtitle_display = SubtitleDisplay(self)
             self.subtitle_display.set_font(self.current_font)
             self.subtitle_display.set_subtitle_color(self.subtitle_color)
+            self.subtitle_display.show_cues(self.engine.active_cues())
+            self.subtitle_display.set_stats_text(self.playback_stats.overlay_text() if self.playback_stats else None)
+            self.engine.subscribe(self.subtitle_display.show_cues)
+            for controls in self.subtitle_tracks:
+                self.subtitle_display.add_track(controls)
             screen = QApplication.primaryScreen().geometry()
             self.subtitle_display.setGeometry(screen)
 
@@ -478,7 +1574,13 @@ class SubtitleReader(QMainWindow):
 
     def toggle_start_from_selected_line(self, state):
         self.start_from_selected_line = state == Qt.CheckState.Checked.value
-        logging.info(f"Start from selected line: {self.start_from_selected_line}")
+        logging.info("Start from selected line: %s", self.start_from_selected_line)
+
+    def toggle_event_driven_timing(self, state):
+        self.event_driven_timing = state == Qt.CheckState.Checked.value
+        self.save_settings()
+        self.schedule_next_update()
+        logging.info("Event-driven timing: %s", self.event_driven_timing)
 
     def dragEnterEvent(self, event: QDragEnterEvent):
         if event.mimeData().hasUrls():
@@ -486,52 +1588,90 @@ class SubtitleReader(QMainWindow):
 
     def dropEvent(self, event: QDropEvent):
         files = [u.toLocalFile() for u in event.mimeData().urls()]
-        for file in files:
-            _, extension = os.path.splitext(file)
-            if extension.lower() in ['.srt', '.vtt', '.ass', '.ssa']:
-                self.load_subtitles(file)
-                break  # Load only the first valid subtitle file
+        files = [file for file in files if os.path.splitext(file)[1].lower() in SUPPORTED_EXTENSIONS + MATROSKA_EXTENSIONS]
+        if files:
+            self.set_playlist(files)  # Several files play back to back in the order they were dropped
         event.acceptProposedAction()
 
     def play_pause_subtitles(self):
         if not self.subtitles:
             return
     
-        if self.subtitle_playing:
+        if self.engine.playing:
             self.subtitle_timer.stop()
-            self.subtitle_playing = False
+            self.engine.pause()
+            self.paused_row = self.subtitle_list.currentIndex().row()
             self.play_pause_button.setText('Play Subtitles')
+            logging.info("Timer wakeups in the last minute: %s", self.wakeups.per_minute())
         else:
+            # Resume where playback was paused, unless another line was selected in the meantime
+            position = None
             if self.start_from_selected_line:
-                current_index = self.subtitle_list.currentRow()
-                if current_index >= 0:
-                    self.subtitle_position = self.get_start_time(self.subtitles[current_index])
-                else:
-                    self.subtitle_position = 0
-            else:
-                self.subtitle_position = 0
+                current_index = self.subtitle_list.currentIndex().row()
+                if current_index >= 0 and current_index != self.paused_row:
+                    position = self.subtitles[current_index].start
 
-            self.elapsed_timer.start()
-            self.last_update_time = 0
-            self.subtitle_timer.start(10)  # Update every 10ms for more precise timing
-            self.subtitle_playing = True
             self.play_pause_button.setText('Pause Subtitles')
-        logging.info(f"Subtitle playback {'paused' if not self.subtitle_playing else 'started'}")
-        if self.subtitle_playing:
-            self.update_subtitle()  # Immediately update the subtitle after starting playback
+            self.engine.play(position)
+            self.schedule_next_update()
+        logging.info("Subtitle playback %s", 'paused' if not self.engine.playing else 'started')
         
+    def seek_to(self, position):
+        self.engine.seek(position)
+        self.schedule_next_update()
+
+    def change_playback_rate(self, index):
+        self.engine.set_rate(self.playback_rate_combo.itemData(index))
+        self.schedule_next_update()
+        logging.info("Playback rate set to %gx", self.engine.rate)
+
+    def show_active_cues(self, cues):
+        # Overlapping cues are stacked in start order
+        text = '<br>'.join(cue.display_text for cue in cues)
+        self.subtitle_label.setText(text)
+        if cues:
+            # Rows have a uniform height, so scrolling to the current cue is a direct jump
+            self.subtitle_list.scrollTo(self.subtitle_model.index(self.engine.cursor.active[0]),
+                                        QAbstractItemView.ScrollHint.EnsureVisible)
+            if logging.getLogger().isEnabledFor(logging.DEBUG):
+                logging.debug("Displaying subtitle: %s (Time: %sms, Start: %sms, End: %sms)",
+                              text, self.engine.position, cues[0].start, cues[-1].end)
+        # Render the next cue now so its boundary only costs a cache lookup
+        next_index = self.engine.cursor.next_index
+        if next_index < len(self.subtitles):
+            render_rich_text(self.subtitles[next_index].text)
+        if self.subtitle_display and self.subtitle_display.isVisible():
+            QTimer.singleShot(PREFETCH_DELAY, self.prefetch_fullscreen_cues)
+
+    def prefetch_fullscreen_cues(self):
+        if self.subtitle_display and self.subtitle_display.isVisible() and self.subtitles:
+            self.subtitle_display.prepare(self.upcoming_cue_texts())
+
+    def upcoming_cue_texts(self, count=PREFETCH_CUES):
+        # The text the main track will show at each of its next few cue boundaries
+        cursor = CueCursor(self.subtitles)
+        cursor.seek(self.engine.current_position())
+        texts = []
+        while len(texts) < count and cursor.next_boundary is not None:
+            cursor.advance(cursor.next_boundary)
+            texts.append('<br>'.join(cue.display_text for cue in cursor.active_cues()))
+        return texts
+
     def get_next_subtitle(self, current_time):
-        for subtitle in self.subtitles:
-            if self.get_start_time(subtitle) > current_time:
-                return subtitle
-        return None
+        index = self.subtitles.next_start_index(current_time)
+        return self.subtitles[index] if index < len(self.subtitles) else None
     
     def closeEvent(self, event):
+        self.stop_player_sync()
+        self.stop_live_input()
         self.save_settings()
+        self.export_playback_stats()
         super().closeEvent(event)
 
 if __name__ == '__main__':
+    configure_logging()
     logging.info("Starting application from subtitle_reader.py")
     app = QApplication(sys.argv)
     ex = SubtitleReader()
+    ex.apply_arguments(app.arguments())
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,68 @@
+import bisect
+import re
+import unicodedata
+from subtitle_text import render_plain_text
+
+MAX_RESULTS = 500
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def normalize(text):
+    # Case- and accent-insensitive form of plain text: markup should already be removed
+    text = text.casefold()
+    if not text.isascii():
+        text = ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+    return ' '.join(text.split())
+
+
+class SearchIndex:
+    # Substring search over the cue texts of a timeline with markup removed. Every cue's
+    # normalized text is stored in one buffer, separated by newlines, which the fallback scan
+    # searches with str.find. Whole words inside the query narrow the search to the cues
+    # listed for them in the inverted index.
+    def __init__(self, timeline):
+        self.timeline = timeline
+        self.texts = []
+        self.postings = {}
+        for index, cue in enumerate(timeline):
+            text = normalize(render_plain_text(cue.text))
+            self.texts.append(text)
+            for word in set(WORD_PATTERN.findall(text)):
+                self.postings.setdefault(word, []).append(index)
+        self.offsets = []
+        offset = 0
+        for text in self.texts:
+            self.offsets.append(offset)
+            offset += len(text) + 1
+        self.buffer = '\n'.join(self.texts)
+
+    def search(self, query, limit=MAX_RESULTS):
+        # Returns the indices of up to limit cues containing the query, in timeline order
+        query = normalize(query)
+        if not query:
+            return []
+        # A word with other characters on both sides in the query must be a whole word in the
+        # cue; words at either end may be part of a longer one
+        whole = [match.group() for match in WORD_PATTERN.finditer(query)
+                 if match.start() > 0 and match.end() < len(query)]
+        if whole:
+            candidates = min((self.postings.get(word, []) for word in whole), key=len)
+            results = []
+            for index in candidates:
+                if query in self.texts[index]:
+                    results.append(index)
+                    if len(results) >= limit:
+                        break
+            return results
+        return self.scan(query, limit)
+
+    def scan(self, query, limit):
+        results = []
+        position = self.buffer.find(query)
+        while position >= 0 and len(results) < limit:
+            index = bisect.bisect_right(self.offsets, position) - 1
+            results.append(index)
+            # Continue after this cue so each cue is reported once
+            next_offset = self.offsets[index + 1] if index + 1 < len(self.offsets) else len(self.buffer)
+            position = self.buffer.find(query, next_offset)
+        return results
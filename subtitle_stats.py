@@ -0,0 +1,148 @@
+import bisect
+import csv
+import json
+import time
+from collections import deque
+
+SAMPLE_LIMIT = 10000  # Recent samples kept per metric for percentiles
+WAKEUP_WINDOW_NS = 60 * 1000000000
+TICK_BUCKETS_MS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50]
+
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class Metric:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.samples = deque(maxlen=SAMPLE_LIMIT)
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        if value > self.maximum:
+            self.maximum = value
+        self.samples.append(value)
+
+    def summary(self):
+        ordered = sorted(self.samples)
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+            'p50': percentile(ordered, 0.5),
+            'p95': percentile(ordered, 0.95),
+            'p99': percentile(ordered, 0.99),
+            'max': self.maximum,
+        }
+
+
+class WakeupCounter:
+    # Timer wakeups during the last minute
+    def __init__(self):
+        self.times = deque()
+
+    def record(self):
+        self.times.append(time.perf_counter_ns())
+        self.per_minute()
+
+    def per_minute(self):
+        cutoff = time.perf_counter_ns() - WAKEUP_WINDOW_NS
+        while self.times and self.times[0] <= cutoff:
+            self.times.popleft()
+        return len(self.times)
+
+
+class PlaybackStats:
+    # Collects timing quality while subtitles play. Callers only hold a PlaybackStats while
+    # collection is turned on, so when it is off the hot path pays a single None check.
+    # wakeups may be a WakeupCounter the caller keeps recording into while stats are off.
+    def __init__(self, wakeups=None):
+        self.tick_ms = Metric()
+        self.tick_histogram = [0] * (len(TICK_BUCKETS_MS) + 1)
+        self.lateness_ms = Metric()  # When a cue boundary took effect minus when it was due
+        self.jitter_ms = Metric()  # How late the timer woke up compared to when it was asked to
+        self.drift_ms = 0.0  # Playback position minus a monotonic reference since the last play/seek
+        self.max_drift_ms = 0.0
+        self.reference = None
+        self.wakeup_due = None
+        self.wakeups = WakeupCounter() if wakeups is None else wakeups
+        self.started = time.time()
+
+    def start_segment(self, position):
+        self.reference = (time.perf_counter_ns(), position)
+        self.drift_ms = 0.0
+
+    def stop_segment(self):
+        self.reference = None
+        self.wakeup_due = None
+
+    def record_position(self, position, rate=1.0):
+        if self.reference is None:
+            return
+        started, start_position = self.reference
+        expected = (time.perf_counter_ns() - started) / 1e6 * rate
+        self.drift_ms = (position - start_position) - expected
+        if abs(self.drift_ms) > abs(self.max_drift_ms):
+            self.max_drift_ms = self.drift_ms
+
+    def record_lateness(self, lateness):
+        self.lateness_ms.add(lateness)
+
+    def record_tick(self, duration):
+        self.tick_ms.add(duration)
+        self.tick_histogram[bisect.bisect_left(TICK_BUCKETS_MS, duration)] += 1
+
+    def expect_wakeup(self, interval):
+        self.wakeup_due = time.perf_counter_ns() + interval * 1000000
+
+    def record_wakeup(self):
+        if self.wakeup_due is not None:
+            self.jitter_ms.add((time.perf_counter_ns() - self.wakeup_due) / 1e6)
+            self.wakeup_due = None
+
+    def histogram(self):
+        labels = [f"<={edge}ms" for edge in TICK_BUCKETS_MS] + [f">{TICK_BUCKETS_MS[-1]}ms"]
+        return dict(zip(labels, self.tick_histogram))
+
+    def summary(self):
+        return {
+            'session_seconds': time.time() - self.started,
+            'tick_ms': self.tick_ms.summary(),
+            'tick_histogram': self.histogram(),
+            'lateness_ms': self.lateness_ms.summary(),
+            'jitter_ms': self.jitter_ms.summary(),
+            'drift_ms': self.drift_ms,
+            'max_drift_ms': self.max_drift_ms,
+            'wakeups_per_minute': self.wakeups.per_minute(),
+        }
+
+    def overlay_text(self):
+        tick = self.tick_ms.summary()
+        lateness = self.lateness_ms.summary()
+        jitter = self.jitter_ms.summary()
+        return (f"tick p50 {tick['p50']:.3f} ms  p99 {tick['p99']:.3f} ms  max {tick['max']:.3f} ms\n"
+                f"lateness p50 {lateness['p50']:.1f} ms  p99 {lateness['p99']:.1f} ms  max {lateness['max']:.1f} ms\n"
+                f"jitter p50 {jitter['p50']:.2f} ms  p99 {jitter['p99']:.2f} ms\n"
+                f"drift {self.drift_ms:+.2f} ms  max {self.max_drift_ms:+.2f} ms\n"
+                f"wakeups {self.wakeups.per_minute()}/min")
+
+    def export_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def export_csv(self, path):
+        # One row per value: metric, statistic, value
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['metric', 'statistic', 'value'])
+            for metric, value in self.summary().items():
+                if isinstance(value, dict):
+                    for statistic, number in value.items():
+                        writer.writerow([metric, statistic, number])
+                else:
+                    writer.writerow([metric, '', value])
@@ -0,0 +1,138 @@
+import codecs
+import logging
+import os
+import select
+import socket
+import stat
+import sys
+from subtitle_parsers import iter_vtt_cues
+from subtitle_sync import monotonic_ms
+from subtitle_worker import InputWorker
+
+POLL_INTERVAL = 0.5  # Seconds a pipe read waits before checking whether the stream was stopped
+
+
+class CueStream(InputWorker):
+    # Reads SRT or WebVTT formatted cues as they arrive, on a worker thread. Every read that
+    # completes one or more cues hands them to on_cues(cues, received), where received is the
+    # monotonic time in ms when the bytes that completed them came in. on_cues and on_error
+    # are called on the worker thread.
+    def __init__(self, on_cues, on_error):
+        super().__init__(on_error)
+        self.on_cues = on_cues
+        self.received = 0.0
+        self.batch = []
+        self.cue_count = 0
+
+    def iter_lines(self, read):
+        # Like subtitle_parsers.iter_lines, but for a stream: the parser has taken every line
+        # of a read before the next read blocks, so the cues they completed are sent right then
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        pending = ''
+        while self.running:
+            chunk = self.receive(read)
+            if not chunk:
+                break
+            self.received = monotonic_ms()
+            lines = (pending + decoder.decode(chunk)).split('\n')
+            pending = lines.pop()
+            for line in lines:
+                yield line.rstrip('\r')
+            self.flush()
+        pending += decoder.decode(b'', final=True)
+        if pending:
+            yield pending.rstrip('\r')
+
+    def read_cues(self, read):
+        # The WebVTT parser also reads SRT: cue numbers are skipped like cue identifiers
+        for cue in iter_vtt_cues(self.iter_lines(read)):
+            self.batch.append(cue)
+        self.flush()
+
+    def flush(self):
+        if self.batch and self.running:
+            self.cue_count += len(self.batch)
+            self.on_cues(self.batch, self.received)
+        self.batch = []
+
+
+class PipeStream(CueStream):
+    # stdin ('-'), a FIFO or a regular file. A FIFO is reopened when its writer goes away, so
+    # the upstream process can be restarted without restarting the viewer.
+    def __init__(self, path, on_cues, on_error):
+        super().__init__(on_cues, on_error)
+        self.path = path
+
+    def pipe_reader(self, fd):
+        # A blocking read of a pipe cannot be interrupted from another thread, so on POSIX it only
+        # starts once select says there is data, and times out so stop() is noticed
+        def read(size):
+            if os.name != 'nt' and not select.select([fd], [], [], POLL_INTERVAL)[0]:
+                raise TimeoutError
+            try:
+                return os.read(fd, size)
+            except BlockingIOError:
+                raise TimeoutError
+        return read
+
+    def run(self):
+        if self.path == '-':
+            self.read_cues(self.pipe_reader(sys.stdin.fileno()))
+            return
+        while self.running:
+            # Non-blocking, so opening a FIFO does not wait for a writer where stop() cannot reach it
+            fd = os.open(self.path, os.O_RDONLY | getattr(os, 'O_NONBLOCK', 0) | getattr(os, 'O_BINARY', 0))
+            try:
+                fifo = stat.S_ISFIFO(os.fstat(fd).st_mode)
+                self.read_cues(self.pipe_reader(fd))
+            finally:
+                os.close(fd)
+            if not fifo:
+                return
+            logging.info("Live input writer closed %s, waiting for the next one", self.path)
+
+
+class SocketStream(CueStream):
+    # Listens on a TCP port; upstream processes connect and send cues, one connection at a time
+    def __init__(self, host, port, on_cues, on_error):
+        super().__init__(on_cues, on_error)
+        self.address = (host, port)
+        self.sock = None
+        self.connection = None
+
+    def stop(self):
+        super().stop()
+        self.close(self.connection)
+
+    def run(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(self.address)
+        self.sock.listen(1)
+        self.sock.settimeout(0.5)
+        while self.running:
+            try:
+                self.connection, peer = self.sock.accept()
+            except socket.timeout:
+                continue
+            logging.info("Live input connected from %s:%s", peer[0], peer[1])
+            self.connection.settimeout(0.5)
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with self.connection:
+                self.read_cues(self.connection.recv)
+            self.connection = None
+
+
+def open_cue_stream(address, on_cues, on_error):
+    # '-' for stdin, 'tcp:127.0.0.1:9100' to listen for a connection, anything else is a path
+    kind, _, rest = address.partition(':')
+    if kind.lower() == 'tcp':
+        host, _, port = rest.rpartition(':')
+        if not port.isdigit():
+            raise ValueError(f"Unknown live input address: {address}")
+        return SocketStream(host or '127.0.0.1', int(port), on_cues, on_error)
+    if address == '-' and sys.stdin is None:
+        raise ValueError("There is no stdin to read live cues from (e.g. in the windowed build)")
+    if address != '-' and not os.path.exists(address):
+        raise ValueError(f"Live input not found: {address}")
+    return PipeStream(address, on_cues, on_error)
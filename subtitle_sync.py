@@ -0,0 +1,245 @@
+import json
+import logging
+import os
+import socket
+import time
+from subtitle_stats import Metric
+from subtitle_worker import InputWorker
+
+SEEK_THRESHOLD = 400  # Larger differences from the predicted position are treated as seeks (ms)
+SMOOTHING = 0.2  # Fraction of a small difference corrected per update
+PING_INTERVAL = 1.0  # Seconds between latency probes to mpv
+PIPE_PREFIX = '\\\\.\\pipe\\'  # mpv's IPC server is a named pipe on Windows
+
+
+def monotonic_ms():
+    # perf_counter rather than monotonic, which only ticks every ~15.6 ms on Windows
+    return time.perf_counter_ns() / 1e6
+
+
+class SyncSample:
+    # One position report from the external player, in milliseconds
+    __slots__ = ('position', 'playing', 'rate', 'received', 'latency')
+
+    def __init__(self, position, playing=None, rate=None, latency=None):
+        self.position = position
+        self.playing = playing
+        self.rate = rate
+        self.received = monotonic_ms()
+        self.latency = latency  # One-way delay from the player, when known
+
+
+class SyncSource(InputWorker):
+    # Reads position reports on a worker thread and hands each SyncSample to on_sample.
+    # on_sample and on_error are called on that thread.
+    def __init__(self, on_sample, on_error):
+        super().__init__(on_error)
+        self.on_sample = on_sample
+
+    def read_lines(self, timeout_callback=None, read=None):
+        pending = b''
+        while self.running:
+            chunk = self.receive(read or self.sock.recv, timeout_callback)
+            if not chunk:
+                if not self.running:
+                    return
+                raise ConnectionError("Player closed the connection")
+            lines = (pending + chunk).split(b'\n')
+            pending = lines.pop()
+            for line in lines:
+                if line.strip():
+                    yield line
+            if timeout_callback:
+                timeout_callback()
+
+
+class MpvSource(SyncSource):
+    # mpv's JSON IPC (--input-ipc-server=/path/to/socket, or \\.\pipe\name on Windows): observes
+    # time-pos, pause and speed, and measures latency as half the round trip of periodic
+    # get_property requests
+    def __init__(self, path, on_sample, on_error):
+        super().__init__(on_sample, on_error)
+        self.path = path
+        self.write = None
+        self.playing = True
+        self.rate = 1.0
+        self.latency = None
+        self.pings = {}
+        self.next_request = 1
+        self.last_ping = 0
+
+    def send(self, command, request_id=None):
+        message = {'command': command}
+        if request_id is not None:
+            message['request_id'] = request_id
+        self.write(json.dumps(message).encode() + b'\n')
+
+    def ping(self):
+        now = time.monotonic()
+        if now - self.last_ping >= PING_INTERVAL:
+            self.last_ping = now
+            self.next_request += 1
+            self.pings[self.next_request] = monotonic_ms()
+            self.send(['get_property', 'time-pos'], self.next_request)
+
+    def observe(self):
+        for number, name in enumerate(('time-pos', 'pause', 'speed'), 1):
+            self.send(['observe_property', number, name])
+
+    def run(self):
+        if self.path.startswith(PIPE_PREFIX):
+            self.run_pipe()
+            return
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(0.5)
+        self.sock.connect(self.path)
+        self.write = self.sock.sendall
+        self.observe()
+        for line in self.read_lines(self.ping):
+            self.handle(line)
+
+    def run_pipe(self):
+        # A named pipe opened like a file has no read timeout, and a write would wait behind the
+        # pending read, so there are no latency pings. mpv sends time-pos changes all the time
+        # while playing, which also lets the loop notice stop() soon after it is called.
+        with open(self.path, 'r+b', buffering=0) as pipe:
+            self.write = pipe.write
+            self.observe()
+            for line in self.read_lines(read=pipe.read):
+                self.handle(line)
+
+    def handle(self, line):
+        try:
+            message = json.loads(line)
+        except ValueError:
+            return
+        if not isinstance(message, dict):
+            return
+        sent = self.pings.pop(message.get('request_id'), None)
+        if sent is not None:
+            self.latency = (monotonic_ms() - sent) / 2
+            return
+        data = message.get('data')
+        if message.get('event') != 'property-change' or data is None:
+            return
+        name = message.get('name')
+        if name == 'pause':
+            self.playing = not data
+        elif not isinstance(data, (int, float)):
+            logging.warning("Ignoring malformed mpv message: %r", line[:80])
+        elif name == 'speed':
+            self.rate = data
+        elif name == 'time-pos':
+            self.on_sample(SyncSample(data * 1000, self.playing, self.rate, self.latency))
+
+
+class TimecodeSource(SyncSource):
+    # A line-based timecode protocol over UDP (we listen) or TCP (we connect). Each line is
+    # either '<seconds>' or a JSON object {"position": seconds, "paused": bool, "rate": float,
+    # "sent": unix time}; when "sent" is given the one-way latency is reported.
+    def __init__(self, protocol, host, port, on_sample, on_error):
+        super().__init__(on_sample, on_error)
+        self.protocol = protocol
+        self.address = (host, port)
+
+    def run(self):
+        if self.protocol == 'udp':
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.sock.bind(self.address)
+            self.sock.settimeout(0.5)
+            while self.running:
+                datagram = self.receive(self.sock.recv)
+                for line in datagram.split(b'\n'):
+                    self.handle(line)
+        else:
+            self.sock = socket.create_connection(self.address)
+            self.sock.settimeout(0.5)
+            for line in self.read_lines():
+                self.handle(line)
+
+    def handle(self, line):
+        line = line.strip()
+        if not line:
+            return
+        try:
+            if line.startswith(b'{'):
+                message = json.loads(line)
+                latency = None
+                if 'sent' in message:
+                    latency = max(time.time() - message['sent'], 0) * 1000
+                paused = message.get('paused')
+                self.on_sample(SyncSample(float(message['position']) * 1000,
+                                          None if paused is None else not paused, message.get('rate'), latency))
+            else:
+                self.on_sample(SyncSample(float(line) * 1000))
+        except (ValueError, KeyError, TypeError):
+            logging.warning("Ignoring malformed timecode: %r", line[:80])
+
+
+def open_sync_source(address, on_sample, on_error):
+    # 'mpv:/tmp/mpvsocket', 'udp:127.0.0.1:9000' or 'tcp:127.0.0.1:9000'
+    kind, _, rest = address.partition(':')
+    kind = kind.lower()
+    if kind == 'mpv' and rest:
+        if not rest.startswith(PIPE_PREFIX) and not hasattr(socket, 'AF_UNIX'):
+            raise ValueError(f"mpv uses a named pipe on this system, e.g. mpv:{PIPE_PREFIX}mpvsocket "
+                             f"with --input-ipc-server={PIPE_PREFIX}mpvsocket")
+        if rest.startswith(PIPE_PREFIX) and os.name != 'nt':
+            raise ValueError(f"Named pipes are only available on Windows: {address}")
+        return MpvSource(rest, on_sample, on_error)
+    if kind in ('udp', 'tcp'):
+        host, _, port = rest.rpartition(':')
+        if port.isdigit():
+            return TimecodeSource(kind, host or '127.0.0.1', int(port), on_sample, on_error)
+    raise ValueError(f"Unknown sync address: {address}")
+
+
+class SyncController:
+    # Applies SyncSamples to a SubtitleEngine on the thread that owns the engine. Small
+    # differences are smoothed out over several updates, large ones are seeks. Each update
+    # costs at most a cursor seek, O(log n) per track.
+    def __init__(self, engine):
+        self.engine = engine
+        self.latency_ms = Metric()  # Player to viewer, when the source can measure it
+        self.delay_ms = Metric()  # Sample arrival to applied on the engine's thread
+        self.error_ms = 0.0
+        self.seeks = 0
+
+    def apply(self, sample):
+        engine = self.engine
+        if not engine.timeline:
+            return
+        if sample.rate and sample.rate != engine.rate:
+            engine.set_rate(sample.rate)
+        # The player has moved on while the sample was travelling and waiting to be applied
+        delay = monotonic_ms() - sample.received
+        self.delay_ms.add(delay)
+        position = sample.position
+        if sample.playing is not False:
+            position += ((sample.latency or 0) + delay) * engine.rate
+            if sample.latency is not None:
+                self.latency_ms.add(sample.latency)
+        position = int(position)
+
+        if sample.playing is False:
+            if engine.playing:
+                engine.pause()
+            if position != engine.position:
+                engine.seek(position)
+            return
+        if not engine.playing:
+            engine.play(position)
+            return
+        predicted = engine.current_position()
+        self.error_ms = position - predicted
+        if abs(self.error_ms) > SEEK_THRESHOLD:
+            self.seeks += 1
+            engine.seek(position)
+        else:
+            engine.sync(predicted + int(self.error_ms * SMOOTHING))
+
+    def status(self):
+        latency = self.latency_ms.summary()
+        delay = self.delay_ms.summary()
+        return (f"sync error {self.error_ms:+.0f} ms, latency p50 {latency['p50']:.1f} ms "
+                f"p99 {latency['p99']:.1f} ms, dispatch p99 {delay['p99']:.1f} ms, {self.seeks} seeks")
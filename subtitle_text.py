@@ -0,0 +1,92 @@
+import html
+import re
+from functools import lru_cache
+
+RENDER_CACHE_SIZE = 8192
+
+# One pass over the raw text finds every markup token: ASS override blocks, HTML/WebVTT tags
+# and ASS line-break escapes. Whatever lies between two matches is literal text, including braces
+# that do not open an override block, e.g. "{laughs}" in SRT dialogue.
+TOKEN_PATTERN = re.compile(r'\{\\[^}]*\}|<[^>]*>|\\[Nnh]|/N')
+OVERRIDE_TAG_PATTERN = re.compile(r'\\(?:([ibus])(\d*)|(r)[^\\]*)(?=\\|$)')
+HTML_TAG_PATTERN = re.compile(r'<\s*(/?)\s*([a-zA-Z]+)')
+
+STYLE_TAGS = ('b', 'i', 'u', 's')
+
+
+def tokenize(text):
+    # Yields ('text', str), ('newline', None) and ('style', {tag: bool}) tokens
+    position = 0
+    for match in TOKEN_PATTERN.finditer(text):
+        if match.start() > position:
+            yield 'text', text[position:match.start()]
+        position = match.end()
+        token = match.group()
+        if token in ('\\N', '\\n', '/N'):
+            yield 'newline', None
+        elif token == '\\h':
+            yield 'text', '\u00a0'
+        elif token[0] == '{':
+            changes = {}
+            for tag, value, reset in OVERRIDE_TAG_PATTERN.findall(token[1:-1]):
+                if reset:  # \r resets to the line's (or a named) style
+                    changes = {style: False for style in STYLE_TAGS}
+                else:
+                    # \b also takes font weights such as \b700
+                    changes[tag] = value not in ('', '0') and (tag != 'b' or value == '1' or int(value) >= 600)
+            if changes:
+                yield 'style', changes
+        else:
+            tag = HTML_TAG_PATTERN.match(token)
+            if tag and tag.group(2).lower() in STYLE_TAGS:
+                yield 'style', {tag.group(2).lower(): not tag.group(1)}
+    if position < len(text):
+        yield 'text', text[position:]
+
+
+def escape_text(value):
+    return html.escape(value, quote=False)
+
+
+def render_tagged(text, open_tag, close_tag, newline='\n', escape=None):
+    # Rewrites the markup of any supported format as the given style tags, e.g. '<{}>' and '</{}>'
+    parts = []
+    active = []
+    state = dict.fromkeys(STYLE_TAGS, False)
+    for kind, value in tokenize(text):
+        if kind == 'text':
+            wanted = [style for style in STYLE_TAGS if state[style]]
+            if wanted != active:
+                parts.extend(close_tag.format(style) for style in reversed(active))
+                parts.extend(open_tag.format(style) for style in wanted)
+                active = wanted
+            parts.append(escape(value) if escape else value)
+        elif kind == 'newline':
+            parts.append(newline)
+        else:
+            state.update(value)
+    parts.extend(close_tag.format(style) for style in reversed(active))
+    return ''.join(parts).strip()
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def render_rich_text(text):
+    # Display-ready rich text: literal text escaped, only <b>/<i>/<u>/<s> and <br> emitted
+    return render_tagged(text, '<{}>', '</{}>', escape=escape_text).replace('\n', '<br>')
+
+
+def render_html_text(text):
+    # SRT/WebVTT cue text: <b>/<i>/<u>/<s> tags and plain line breaks
+    return render_tagged(text, '<{}>', '</{}>')
+
+
+def render_ass_text(text):
+    # ASS dialogue text: override tags and \N line breaks
+    return render_tagged(text, '{{\\{}1}}', '{{\\{}0}}', newline='\\N')
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def render_plain_text(text):
+    # The cue text with all markup removed and line breaks kept as newlines
+    return ''.join(value if kind == 'text' else '\n' for kind, value in tokenize(text)
+                   if kind != 'style').strip()
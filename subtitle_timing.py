@@ -0,0 +1,144 @@
+import re
+import numpy as np
+from subtitle_cues import Cue, CueTimeline, time_to_milliseconds
+from subtitle_text import TOKEN_PATTERN, render_plain_text
+
+# Quality check limits, in milliseconds and characters per second
+MIN_GAP = 84  # Two frames at 23.976 fps; closer cues look like a flicker
+MIN_DURATION = 833
+MAX_DURATION = 7000
+MAX_CPS = 20
+
+OVERLAP = 1
+SHORT_GAP = 2
+SHORT_DURATION = 4
+LONG_DURATION = 8
+READING_SPEED = 16
+FLAG_NAMES = [(OVERLAP, 'overlap'), (SHORT_GAP, 'short gap'), (SHORT_DURATION, 'too short'),
+              (LONG_DURATION, 'too long'), (READING_SPEED, 'too fast to read')]
+
+FRAME_RATES = {'23.976': 24000 / 1001, '29.97': 30000 / 1001, '59.94': 60000 / 1001}
+SYNC_POINT_PATTERN = re.compile(r'^([^=]+)=([^=]+)$')
+
+
+def visible_length(text):
+    # Characters a viewer has to read; most cues have no markup and skip the tokenizer
+    if TOKEN_PATTERN.search(text) is None:
+        text = text.strip()
+        return len(text) - text.count('\n')
+    return len(render_plain_text(text).replace('\n', ''))
+
+
+def cue_texts(timeline):
+    texts = getattr(timeline.cues, 'texts', None)
+    return texts() if texts else [cue.text for cue in timeline.cues]
+
+
+def timing_arrays(timeline):
+    # Start, end and visible length of every cue as int64 arrays. The start and end columns are
+    # converted in one pass each (lists and the cue cache's arrays alike); only the lengths need the text.
+    starts = np.array(timeline.starts, dtype=np.int64)
+    ends = np.array(timeline.ends, dtype=np.int64)
+    lengths = np.fromiter(map(visible_length, cue_texts(timeline)), dtype=np.int64, count=len(timeline))
+    return starts, ends, lengths
+
+
+class TimingReport:
+    def __init__(self, starts, ends, lengths, min_gap=MIN_GAP, min_duration=MIN_DURATION,
+                 max_duration=MAX_DURATION, max_cps=MAX_CPS):
+        durations = ends - starts
+        # Cues are in start order, so a cue overlaps an earlier one exactly when it starts
+        # before the latest end seen so far
+        gaps = np.full(len(starts), min_gap, dtype=np.int64)
+        gaps[1:] = starts[1:] - np.maximum.accumulate(ends[:-1])
+        self.cps = np.divide(lengths * 1000.0, durations, out=np.full(len(starts), np.inf),
+                             where=durations > 0)
+        self.flags = ((gaps < 0) * OVERLAP
+                      | ((gaps >= 0) & (gaps < min_gap)) * SHORT_GAP
+                      | (durations < min_duration) * SHORT_DURATION
+                      | (durations > max_duration) * LONG_DURATION
+                      | ((self.cps > max_cps) & (lengths > 0)) * READING_SPEED).astype(np.uint8)
+        self.counts = {name: int(np.count_nonzero(self.flags & flag)) for flag, name in FLAG_NAMES}
+        self.flagged = int(np.count_nonzero(self.flags))
+
+    def describe(self, index):
+        flags = int(self.flags[index])
+        problems = [name for flag, name in FLAG_NAMES if flags & flag]
+        if flags & READING_SPEED:
+            problems[-1] += f" ({self.cps[index]:.1f} cps)"
+        return ', '.join(problems)
+
+    def summary(self):
+        if not self.flagged:
+            return "No timing problems found"
+        counts = ', '.join(f"{count} {name}" for name, count in self.counts.items() if count)
+        return f"{self.flagged} cues with timing problems: {counts}"
+
+
+def analyze_timing(timeline, **limits):
+    return TimingReport(*timing_arrays(timeline), **limits)
+
+
+def two_point_sync(old_first, new_first, old_second, new_second):
+    # Scale and shift that move two reference times to where they should be
+    if old_first == old_second:
+        raise ValueError("The two sync points must be at different times")
+    scale = (new_second - new_first) / (old_second - old_first)
+    if scale <= 0:
+        raise ValueError("The sync points would reverse the cue order")
+    return scale, new_first - old_first * scale
+
+
+def frame_rate(value):
+    value = value.strip()
+    return FRAME_RATES.get(value) or float(value)
+
+
+def parse_offset(value):
+    sign = -1 if value.startswith('-') else 1
+    return sign * time_to_milliseconds(value.lstrip('+-'))
+
+
+def parse_retime(spec):
+    # "shift -1500", "scale 1.001", "fps 23.976 25" or "sync 00:01:00,000=00:01:02,500 01:30:00=01:30:05"
+    # into (scale, shift); times are scaled first and then shifted by milliseconds
+    words = spec.split()
+    command, arguments = (words[0].lower(), words[1:]) if words else ('', [])
+    try:
+        if command == 'shift' and len(arguments) == 1:
+            return 1.0, float(parse_offset(arguments[0]))
+        if command == 'scale' and len(arguments) == 1 and float(arguments[0]) > 0:
+            return float(arguments[0]), 0.0
+        if command == 'fps' and len(arguments) == 2:
+            # Frames keep their number, so a time at the old rate becomes old / new times as long
+            return frame_rate(arguments[0]) / frame_rate(arguments[1]), 0.0
+        points = [SYNC_POINT_PATTERN.match(argument) for argument in arguments]
+        if command == 'sync' and len(points) == 2 and all(points):
+            (old_first, new_first), (old_second, new_second) = (
+                map(time_to_milliseconds, point.groups()) for point in points)
+            sync = (old_first, new_first, old_second, new_second)
+        else:
+            sync = None
+    except (ValueError, ZeroDivisionError):
+        sync = None
+    if sync:
+        return two_point_sync(*sync)
+    raise ValueError(f"Invalid retiming: {spec!r} (use shift MS, scale FACTOR, fps FROM TO "
+                     f"or sync OLD=NEW OLD=NEW)")
+
+
+def retime_arrays(starts, ends, scale=1.0, shift=0.0):
+    # Cues pushed entirely before zero are dropped and the rest clamped at zero
+    new_starts = np.rint(starts * scale + shift).astype(np.int64)
+    new_ends = np.rint(ends * scale + shift).astype(np.int64)
+    keep = new_ends > 0
+    return np.maximum(new_starts, 0), new_ends, keep
+
+
+def retime_timeline(timeline, scale=1.0, shift=0.0):
+    starts, ends, keep = retime_arrays(np.array(timeline.starts, dtype=np.int64),
+                                       np.array(timeline.ends, dtype=np.int64), scale, shift)
+    texts = cue_texts(timeline)
+    # A positive scale keeps the start order, so the new timeline needs no sort
+    return CueTimeline([Cue(start, end, texts[index]) for index, start, end in
+                        zip(np.flatnonzero(keep).tolist(), starts[keep].tolist(), ends[keep].tolist())])
@@ -0,0 +1,178 @@
+import codecs
+import os
+import re
+from bisect import bisect_right
+from subtitle_cues import CueTimeline
+from subtitle_encoding import detect_file_encoding
+from subtitle_loader import read_file
+from subtitle_parsers import iter_ass_cues, iter_srt_cues, iter_vtt_cues
+
+COMPARE_CHUNK = 64 * 1024
+BLOCK_SEPARATORS = {
+    '.srt': re.compile(rb'\r?\n(?:[ \t]*\r?\n)+'),  # Blank lines
+    '.vtt': re.compile(rb'\r?\n(?:[ \t]*\r?\n)+'),
+    '.ass': re.compile(rb'\r?\n'),  # Every line
+    '.ssa': re.compile(rb'\r?\n'),
+}
+
+
+def common_prefix_length(a, b, limit):
+    # Compares 64 KiB slices first, then bisects inside the first one that differs
+    position = 0
+    while position < limit and a[position:position + COMPARE_CHUNK] == b[position:position + COMPARE_CHUNK]:
+        position += COMPARE_CHUNK
+    low, high = position, min(position + COMPARE_CHUNK, limit)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[position:middle] == b[position:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return min(low, limit)
+
+
+def common_suffix_length(a, b, limit):
+    # Same as common_prefix_length, counted from the ends of a and b
+    length = 0
+    while length + COMPARE_CHUNK <= limit and \
+            a[len(a) - length - COMPARE_CHUNK:len(a) - length] == b[len(b) - length - COMPARE_CHUNK:len(b) - length]:
+        length += COMPARE_CHUNK
+    low, high = length, min(length + COMPARE_CHUNK, limit)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[len(a) - middle:len(a) - length] == b[len(b) - middle:len(b) - length]:
+            low = middle
+        else:
+            high = middle - 1
+    return min(low, limit)
+
+
+def is_ascii_compatible(encoding):
+    # Line feeds are single 0x0A bytes that never occur inside a multi-byte character
+    return codecs.lookup(encoding).name not in ('utf-16', 'utf-16-le', 'utf-16-be', 'utf-32', 'utf-32-le', 'utf-32-be')
+
+
+class WatchedSubtitleFile:
+    # Keeps the raw bytes of a subtitle file, the byte offset of every block (cues separated
+    # by blank lines, or lines for ASS/SSA) and the cue parsed from each block. After an edit
+    # the bytes that differ are located, and only the blocks around them are parsed again
+    # and patched into the timeline.
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self.extension = os.path.splitext(file_name)[1].lower()
+        self.separator = BLOCK_SEPARATORS[self.extension]
+        self.data = b''
+        self.encoding = None
+        self.block_starts = []
+        self.block_cues = []  # Cue or None for every block
+        self.ass_format = None
+        self.timeline = None
+
+    def read(self):
+        data = read_file(self.file_name)
+        try:
+            return bytes(data)
+        finally:
+            if hasattr(data, 'close'):
+                data.close()
+
+    def split(self, data, base=0):
+        # Returns the start offset and bytes of every block in data
+        starts = [base]
+        blocks = []
+        position = 0
+        for match in self.separator.finditer(data):
+            blocks.append(data[position:match.start()])
+            position = match.end()
+            starts.append(base + position)
+        blocks.append(data[position:])
+        return starts, blocks
+
+    def decode(self, block, errors='strict'):
+        return codecs.decode(block, self.encoding, errors).lstrip('﻿')
+
+    def find_ass_format(self, lines):
+        in_events = False
+        for line in lines:
+            stripped = line.strip()
+            if stripped.startswith('['):
+                in_events = stripped.lower() == '[events]'
+            elif in_events and stripped.lower().startswith('format:'):
+                return stripped
+        return None
+
+    def parse_block(self, text):
+        # Lines lose their '\r' like in subtitle_parsers.iter_lines, so CRLF files give the same cues
+        if self.extension == '.srt':
+            return next(iter_srt_cues(line.rstrip('\r') for line in text.split('\n')), None)
+        if self.extension == '.vtt':
+            return next(iter_vtt_cues(line.rstrip('\r') for line in text.split('\n')), None)
+        if not text.lstrip().lower().startswith('dialogue:'):
+            return None
+        context = ['[Events]', self.ass_format] if self.ass_format else ['[Events]']
+        return next(iter_ass_cues(context + [text.rstrip('\r')]), None)
+
+    def load(self):
+        # Parses every block once; later reloads only parse what changed
+        self.data = self.read()
+        self.encoding = detect_file_encoding(self.file_name, self.data)
+        self.block_starts, blocks = self.split(self.data)
+        texts = [self.decode(block, 'replace') for block in blocks]
+        if self.extension in ('.ass', '.ssa'):
+            self.ass_format = self.find_ass_format(texts)
+        self.block_cues = [self.parse_block(text) for text in texts]
+        self.timeline = CueTimeline(cue for cue in self.block_cues if cue is not None)
+        return self.timeline
+
+    def reload(self):
+        # Returns (timeline, first, removed, added) describing the cues that changed, in
+        # timeline indices, or None if nothing did. first is None when the whole timeline had
+        # to be rebuilt (cues out of file order, a new ASS format line or a new encoding).
+        data = self.read()
+        old = self.data
+        if data == old:
+            return None
+        if not is_ascii_compatible(self.encoding):
+            return self.load(), None, None, None
+
+        limit = min(len(old), len(data))
+        prefix = common_prefix_length(old, data, limit)
+        suffix = common_suffix_length(old, data, limit - prefix)
+        delta = len(data) - len(old)
+        starts = self.block_starts
+        # One block of margin on both sides, so a separator that was typed or deleted next to
+        # the change is inside the re-parsed range
+        first_block = max(bisect_right(starts, prefix) - 2, 0)
+        end_block = min(bisect_right(starts, len(old) - suffix) + 1, len(starts))
+        region_start = starts[first_block]
+        region_end = starts[end_block] + delta if end_block < len(starts) else len(data)
+
+        new_starts, blocks = self.split(data[region_start:region_end], region_start)
+        if end_block < len(starts):
+            # The region ends where the next unchanged block starts, not inside a block
+            new_starts.pop()
+            blocks.pop()
+        try:
+            texts = [self.decode(block) for block in blocks]
+        except UnicodeDecodeError:
+            return self.load(), None, None, None
+        if self.extension in ('.ass', '.ssa') and any(
+                text.lstrip().startswith('[') or text.lstrip().lower().startswith('format:') for text in texts):
+            return self.load(), None, None, None
+
+        new_cues = [self.parse_block(text) for text in texts]
+        removed_cues = self.block_cues[first_block:end_block]
+        first = first_block - self.block_cues[:first_block].count(None)
+        removed = len(removed_cues) - removed_cues.count(None)
+        added = [cue for cue in new_cues if cue is not None]
+
+        self.data = data
+        self.block_starts = starts[:first_block] + new_starts + [start + delta for start in starts[end_block:]]
+        self.block_cues[first_block:end_block] = new_cues
+        if not self.timeline.in_order:
+            self.timeline = CueTimeline(cue for cue in self.block_cues if cue is not None)
+            return self.timeline, None, None, None
+        self.timeline = self.timeline.patched(first, removed, added)
+        if not self.timeline.in_order:
+            return self.timeline, None, None, None
+        return self.timeline, first, removed, len(added)
@@ -0,0 +1,50 @@
+import threading
+
+READ_SIZE = 65536
+
+
+class InputWorker:
+    # Reads from a socket, pipe or file on a daemon worker thread. run() does the reading;
+    # anything that ends it early is handed to on_error(message), on the worker thread.
+    def __init__(self, on_error):
+        self.on_error = on_error
+        self.running = False
+        self.sock = None
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run_safely, name=type(self).__name__, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        # Closing the socket wakes a thread blocked on it; reads of other kinds time out (see receive)
+        self.running = False
+        self.close(self.sock)
+
+    def close(self, resource):
+        if resource:
+            try:
+                resource.close()
+            except OSError:
+                pass
+
+    def run_safely(self):
+        # Anything that ends the thread is reported, so the UI never waits on a worker that has stopped
+        try:
+            self.run()
+        except Exception as e:
+            if self.running:
+                self.on_error(str(e) or type(e).__name__)
+        self.running = False
+
+    def receive(self, read, timeout_callback=None):
+        # The next chunk from read(size), or b'' at the end of the input or once stopped. read
+        # raises TimeoutError (socket.timeout) now and then, so stop() is noticed while it is quiet.
+        while self.running:
+            try:
+                return read(READ_SIZE)
+            except TimeoutError:
+                if timeout_callback:
+                    timeout_callback()
+        return b''
@@ -0,0 +1,179 @@
+import os
+import re
+from subtitle_cues import format_timestamp, time_to_milliseconds
+from subtitle_encoding import detect_encoding
+from subtitle_parsers import DEFAULT_ASS_EVENT_FORMAT
+from subtitle_text import render_ass_text, render_html_text, render_plain_text
+
+ASS_HEADER = """[Script Info]
+ScriptType: v4.00+
+WrapStyle: 0
+ScaledBorderAndShadow: yes
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Default,Arial,20,&H00FFFFFF,&H000000FF,&H00000000,&H00000000,0,0,0,0,100,100,0,0,1,2,2,2,10,10,10,1
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+# Formats whose source text can be retimed in place, keeping everything but the timestamps
+REWRITE_EXTENSIONS = ['.srt', '.vtt', '.ass', '.ssa']
+TIMING_LINE_PATTERN = re.compile(r'^(\s*)(\S+)(\s*-->\s*)(\S+)(.*)$')
+VTT_INLINE_TIMESTAMP_PATTERN = re.compile(r'<((?:\d+:)?\d+:\d+\.\d+)>')
+
+
+def format_vtt_timestamp(ms):
+    return format_timestamp(ms).replace(',', '.')
+
+
+def format_ass_timestamp(ms):
+    # ASS uses H:MM:SS.cc (centiseconds)
+    ms = max(ms, 0)
+    hours, ms = divmod(ms, 3600000)
+    minutes, ms = divmod(ms, 60000)
+    seconds, ms = divmod(ms, 1000)
+    return f"{hours}:{minutes:02d}:{seconds:02d}.{ms // 10:02d}"
+
+
+def iter_srt(cues, text_format):
+    for number, cue in enumerate(cues, 1):
+        yield f"{number}\n{format_timestamp(cue.start)} --> {format_timestamp(cue.end)}\n{text_format(cue.text)}\n\n"
+
+
+def iter_vtt(cues, text_format):
+    yield "WEBVTT\n\n"
+    for cue in cues:
+        # A blank line would end the cue early
+        text = '\n'.join(line for line in text_format(cue.text).split('\n') if line.strip())
+        yield f"{format_vtt_timestamp(cue.start)} --> {format_vtt_timestamp(cue.end)}\n{text}\n\n"
+
+
+def iter_ass(cues, text_format):
+    yield ASS_HEADER
+    for cue in cues:
+        text = text_format(cue.text).replace('\n', '\\N')
+        yield f"Dialogue: 0,{format_ass_timestamp(cue.start)},{format_ass_timestamp(cue.end)},Default,,0,0,0,,{text}\n"
+
+
+WRITERS = {
+    '.srt': (iter_srt, render_html_text),
+    '.vtt': (iter_vtt, render_html_text),
+    '.ass': (iter_ass, render_ass_text),
+}
+
+
+def write_cues(file_name, cues, extension, keep_markup=True):
+    # Streams the cues to a UTF-8 file, rewriting their markup for the target format
+    iter_format, text_format = WRITERS[extension]
+    if not keep_markup:
+        text_format = render_plain_text
+    with open(file_name, 'w', encoding='utf-8', newline='\n') as f:
+        for block in iter_format(cues, text_format):
+            f.write(block)
+
+
+def retime_ms(ms, scale, shift):
+    return round(ms * scale + shift)
+
+
+def line_ending(line):
+    return line[len(line.rstrip('\r\n')):]
+
+
+def retime_inline_timestamps(line, scale, shift):
+    return VTT_INLINE_TIMESTAMP_PATTERN.sub(
+        lambda match: f"<{format_vtt_timestamp(max(retime_ms(time_to_milliseconds(match.group(1)), scale, shift), 0))}>",
+        line)
+
+
+def iter_blocks(lines):
+    # SRT and WebVTT blocks with the blank lines that end them
+    block = []
+    for line in lines:
+        block.append(line)
+        if not line.strip():
+            yield block
+            block = []
+    if block:
+        yield block
+
+
+def retime_text_blocks(lines, extension, scale, shift):
+    # Only the timing lines (and WebVTT's inline karaoke timestamps) change. Cues moved entirely
+    # before zero are dropped and the remaining SRT cues renumbered, like retime_arrays does.
+    # Returns the new lines and the number of cues in them.
+    format_time = format_timestamp if extension == '.srt' else format_vtt_timestamp
+    output = []
+    number = 0
+    for block in iter_blocks(lines):
+        timing = next((index for index, line in enumerate(block) if '-->' in line), None)
+        match = TIMING_LINE_PATTERN.match(block[timing].rstrip('\r\n')) if timing is not None else None
+        try:
+            start, end = (retime_ms(time_to_milliseconds(match.group(group)), scale, shift) for group in (2, 4))
+        except (AttributeError, ValueError):
+            output.extend(block)  # Headers, notes, styles and anything unparsable stay as they are
+            continue
+        if end <= 0:
+            continue
+        number += 1
+        block[timing] = (f"{match.group(1)}{format_time(max(start, 0))}{match.group(3)}{format_time(end)}"
+                         f"{match.group(5)}{line_ending(block[timing])}")
+        if extension == '.srt' and timing == 1 and block[0].strip().isdigit():
+            block[0] = f"{number}{line_ending(block[0])}"
+        elif extension == '.vtt':
+            block[timing + 1:] = [retime_inline_timestamps(line, scale, shift) for line in block[timing + 1:]]
+        output.extend(block)
+    return output, number
+
+
+def retime_event_lines(lines, scale, shift):
+    # ASS/SSA: the Start and End fields of Dialogue and Comment lines, found through the
+    # [Events] Format line. Styles, overrides and script info are left untouched. Returns the
+    # new lines and the number of Dialogue lines (the cues) in them.
+    fields = DEFAULT_ASS_EVENT_FORMAT
+    output = []
+    count = 0
+    for line in lines:
+        kind, colon, rest = line.partition(':')
+        kind = kind.strip().lower()
+        if colon and kind == 'format' and 'start' in rest.lower():
+            fields = [field.strip().lower() for field in rest.split(',')]
+        elif colon and kind in ('dialogue', 'comment') and 'start' in fields and 'end' in fields:
+            values = rest.split(',', len(fields) - 1)
+            try:
+                start, end = (retime_ms(time_to_milliseconds(values[fields.index(name)]), scale, shift)
+                              for name in ('start', 'end'))
+            except (IndexError, ValueError):
+                output.append(line)
+                continue
+            if end <= 0:
+                continue
+            values[fields.index('start')] = format_ass_timestamp(start)
+            values[fields.index('end')] = format_ass_timestamp(end)
+            line = f"{line[:len(line) - len(rest)]}{','.join(values)}"
+            count += kind == 'dialogue'
+        output.append(line)
+    return output, count
+
+
+def retime_source_text(text, extension, scale=1.0, shift=0.0):
+    # The retimed text and the number of cues it has
+    lines = text.splitlines(keepends=True)
+    if extension in ('.ass', '.ssa'):
+        lines, count = retime_event_lines(lines, scale, shift)
+    else:
+        lines, count = retime_text_blocks(lines, extension, scale, shift)
+    return ''.join(lines), count
+
+
+def write_retimed_source(source_file, file_name, scale=1.0, shift=0.0):
+    # Copies a subtitle file with only its timestamps changed, so markup, styles and positioning
+    # the parsed cues do not keep survive. Written as UTF-8 like write_cues. Returns the cue count.
+    with open(source_file, 'rb') as f:
+        data = f.read()
+    text, count = retime_source_text(data.decode(detect_encoding(data)), os.path.splitext(source_file)[1].lower(),
+                                     scale, shift)
+    with open(file_name, 'w', encoding='utf-8', newline='') as f:
+        f.write(text)
+    return count